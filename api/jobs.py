@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from api.models import JobStatusResponse, ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+# A job function receives a progress callback and returns the final result
+JobFunction = Callable[[Callable[[str, int, int], None]], ProcessingResult]
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue has reached its configured capacity"""
+
+
+class Job:
+    """State of a single background processing job"""
+
+    def __init__(self, filename: str, stages: tuple):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"
+        self.submitted_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.progress: Dict[str, Dict[str, int]] = {
+            stage: {"done": 0, "total": 0} for stage in stages
+        }
+        self.result: Optional[ProcessingResult] = None
+        self.error: Optional[str] = None
+
+    def to_response(self) -> JobStatusResponse:
+        return JobStatusResponse(
+            job_id=self.id,
+            filename=self.filename,
+            status=self.status,
+            submitted_at=self.submitted_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            progress=self.progress,
+            result=self.result,
+            error=self.error,
+        )
+
+
+class JobManager:
+    """
+    Runs processing jobs on a bounded background worker pool.
+
+    Jobs are kept in memory; finished jobs are evicted oldest-first once
+    more than `max_finished` of them have accumulated.
+    """
+
+    def __init__(
+        self, max_workers: int = 2, max_pending: int = 500, max_finished: int = 1000
+    ):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job-worker"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        filename: str,
+        stages: tuple,
+        func: JobFunction,
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> Job:
+        """
+        Queues `func` for background execution and returns its job.
+
+        `on_done` always runs once the job has finished, successfully or not,
+        and is meant for cleaning up resources such as temporary files.
+        """
+        with self._lock:
+            pending = sum(
+                1 for job in self._jobs.values() if job.status in ("queued", "running")
+            )
+            if pending >= self.max_pending:
+                raise JobQueueFullError(
+                    f"Job queue is full ({self.max_pending} pending jobs)"
+                )
+            job = Job(filename, stages)
+            self._jobs[job.id] = job
+            self._evict_finished()
+
+        future = self._executor.submit(self._run, job, func, on_done)
+        # Jobs dropped from the queue at shutdown never reach _run
+        future.add_done_callback(
+            lambda f: self._cancelled(job, on_done) if f.cancelled() else None
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """Stops taking jobs; queued jobs are failed and cleaned up, running ones finish."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(
+        self, job: Job, func: JobFunction, on_done: Optional[Callable[[], None]]
+    ) -> None:
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+
+        def progress(stage: str, done: int, total: int) -> None:
+            job.progress[stage] = {"done": done, "total": total}
+
+        try:
+            job.result = func(progress)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            self._cleanup(job, on_done)
+
+    def _cancelled(self, job: Job, on_done: Optional[Callable[[], None]]) -> None:
+        job.error = "Cancelled at shutdown before it started"
+        job.status = "failed"
+        job.finished_at = datetime.now().isoformat()
+        self._cleanup(job, on_done)
+
+    def _cleanup(self, job: Job, on_done: Optional[Callable[[], None]]) -> None:
+        if on_done is not None:
+            try:
+                on_done()
+            except Exception as e:
+                logger.warning(f"Cleanup for job {job.id} failed: {e}")
+
+    def _evict_finished(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+
+def create_job_manager() -> JobManager:
+    """Create a job manager configured from the environment"""
+    return JobManager(
+        max_workers=int(os.getenv("JOB_WORKERS", "2")),
+        max_pending=int(os.getenv("JOB_MAX_PENDING", "500")),
+        max_finished=int(os.getenv("JOB_MAX_FINISHED", "1000")),
+    )
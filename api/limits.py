@@ -0,0 +1,54 @@
+from typing import Dict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.models import ErrorResponse
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects request bodies over a per-path byte limit with 413 before the
+    app parses them
+
+    A request whose Content-Length is over the limit is refused without
+    reading its body. Otherwise the body is counted as it streams in, since
+    chunked uploads send no length, and the request fails as soon as it
+    passes the limit, before the multipart parser spools any more of it
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the {limit} byte upload limit"
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            # Same body as the app's HTTPException handler gives the 413 below
+            response = JSONResponse(
+                ErrorResponse(message=detail, details={"status_code": 413}).dict(),
+                status_code=413,
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the app, so FastAPI turns it into the response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
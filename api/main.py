@@ -1,23 +1,64 @@
+import asyncio
+import hashlib
+import json
 import logging
 import os
 import tempfile
+import threading
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 from fastapi import FastAPI, File, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
-from api.models import ErrorResponse, HealthResponse, ProcessingResult
-from src.extraction.extractor import LabDataExtractor
-from src.ocr.processor import OcrProcessor
-from src.utils.file_utils import split_pdf_into_pages
+from api.jobs import JobManager, JobQueueFullError, create_job_manager
+from api.limits import UploadSizeLimitMiddleware
+from api.models import (
+    CacheInvalidationResponse,
+    CacheStatsResponse,
+    ErrorResponse,
+    HealthResponse,
+    JobStatusResponse,
+    JobSubmittedResponse,
+    LlmSchedulerStatsResponse,
+    ModelStatsResponse,
+    ProcessingResult,
+)
+from src.extraction.cache import ExtractionCache, create_extraction_cache
+from src.extraction.scheduler import LlmScheduler, create_llm_scheduler
+from src.ocr.cache import OcrCache
+from src.ocr.model_registry import marker_models
+from src.ocr.processor import OcrProcessor, create_ocr_processor
+from src.pipeline.executors import StageExecutors, create_stage_executors
+from src.pipeline.runner import (
+    EventCallback,
+    LabPipeline,
+    ProgressCallback,
+    create_lab_pipeline,
+)
+from src.utils.file_utils import get_pdf_page_count
+from src.utils.metrics import documents_in_flight, registry, stage_seconds
+
+if TYPE_CHECKING:
+    from src.extraction.extractor import LabDataExtractor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Uploads are copied to disk in chunks of this size, never read whole
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "50"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+MAX_UPLOAD_PAGES = int(os.getenv("MAX_UPLOAD_PAGES", "200"))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "50"))
+MAX_BATCH_UPLOAD_MB = float(os.getenv("MAX_BATCH_UPLOAD_MB", "200"))
+# Room for multipart boundaries and part headers on top of the files themselves
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Diabetes3D Lab Results API",
@@ -36,29 +77,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before the multipart parser spools them to disk
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/process-lab-results": MAX_UPLOAD_BYTES + UPLOAD_OVERHEAD_BYTES,
+        "/process-lab-results/stream": MAX_UPLOAD_BYTES + UPLOAD_OVERHEAD_BYTES,
+        "/jobs": MAX_UPLOAD_BYTES + UPLOAD_OVERHEAD_BYTES,
+        "/batch-process": int(MAX_BATCH_UPLOAD_MB * 1024 * 1024) + UPLOAD_OVERHEAD_BYTES,
+    },
+)
+
 # Initialize processors (lazy loading)
 _ocr_processor = None
 _extractor = None
+_pipeline = None
+_job_manager = None
+_stage_executors = None
+# One lock per singleton: building the extractor imports DSPy, which takes
+# seconds and must not hold up the cheap getters. Async handlers resolve
+# getters with asyncio.to_thread, so a cold start never blocks the loop.
+_ocr_processor_lock = threading.Lock()
+_extractor_lock = threading.Lock()
+_pipeline_lock = threading.Lock()
+_stage_executors_lock = threading.Lock()
+_job_manager_lock = threading.Lock()
 
 
 def get_ocr_processor() -> OcrProcessor:
     """Get or create OCR processor instance"""
     global _ocr_processor
-    if _ocr_processor is None:
-        logger.info("Initializing OCR processor...")
-        _ocr_processor = OcrProcessor()
+    with _ocr_processor_lock:
+        if _ocr_processor is None:
+            logger.info("Initializing OCR processor...")
+            _ocr_processor = create_ocr_processor()
     return _ocr_processor
 
 
-def get_extractor() -> LabDataExtractor:
+def get_ocr_cache() -> OcrCache:
+    """Get the OCR cache, failing with 404 when caching is disabled"""
+    cache = get_ocr_processor().cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="OCR cache is disabled")
+    return cache
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Get the extraction cache, failing with 404 when caching is disabled"""
+    cache = get_extractor().cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Extraction cache is disabled")
+    return cache
+
+
+def get_extractor() -> "LabDataExtractor":
     """Get or create lab data extractor instance"""
     global _extractor
-    if _extractor is None:
-        logger.info("Initializing lab data extractor...")
-        _extractor = LabDataExtractor()
+    with _extractor_lock:
+        if _extractor is None:
+            # DSPy is imported on first use so the server binds its port quickly
+            from src.extraction.extractor import LabDataExtractor
+            
+            logger.info("Initializing lab data extractor...")
+            _extractor = LabDataExtractor(
+                cache=create_extraction_cache(), scheduler=create_llm_scheduler()
+            )
     return _extractor
 
 
+def get_llm_scheduler() -> LlmScheduler:
+    """Get the LLM request scheduler, failing with 404 when it is disabled"""
+    scheduler = get_extractor().scheduler
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail="LLM scheduler is disabled")
+    return scheduler
+
+
+def get_pipeline() -> LabPipeline:
+    """Get or create the shared lab pipeline instance"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = create_lab_pipeline(
+                get_ocr_processor(), get_extractor(), get_stage_executors()
+            )
+    return _pipeline
+
+
+def get_stage_executors() -> StageExecutors:
+    """Get or create the bounded per-stage executors"""
+    global _stage_executors
+    with _stage_executors_lock:
+        if _stage_executors is None:
+            _stage_executors = create_stage_executors()
+    return _stage_executors
+
+
+def get_job_manager() -> JobManager:
+    """Get or create the background job manager"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = create_job_manager()
+    return _job_manager
+
+
+@app.on_event("startup")
+async def warm_marker_models():
+    """Optionally load the Marker models in the background at startup"""
+    if os.getenv("MARKER_PRELOAD", "false").lower() == "true":
+        logger.info("Preloading Marker models in the background...")
+        threading.Thread(target=marker_models.get_artifacts, daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def stop_workers():
+    """Stop background jobs and stage executors when the server shuts down"""
+    if _job_manager is not None:
+        _job_manager.shutdown()
+    if _stage_executors is not None:
+        _stage_executors.shutdown()
+    if _extractor is not None and _extractor.scheduler is not None:
+        _extractor.scheduler.shutdown()
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -68,6 +210,71 @@ async def health_check():
     )
 
 
+@app.get("/models", response_model=ModelStatsResponse)
+async def model_stats():
+    """Load time and memory footprint of the shared OCR models"""
+    return ModelStatsResponse(marker=marker_models.stats())
+
+
+@app.get("/cache/ocr", response_model=CacheStatsResponse)
+async def ocr_cache_stats():
+    """Hit/miss statistics and size of the OCR result cache"""
+    stats = await asyncio.to_thread(lambda: get_ocr_cache().stats())
+    return CacheStatsResponse(cache="ocr", stats=stats)
+
+
+@app.delete("/cache/ocr", response_model=CacheInvalidationResponse)
+async def invalidate_ocr_cache(strategy: Optional[str] = None):
+    """
+    Invalidate cached OCR results
+    
+    - **strategy**: Only drop entries of this strategy (e.g. `MarkerOcrStrategy`)
+    """
+    removed = await asyncio.to_thread(lambda: get_ocr_cache().invalidate(strategy))
+    logger.info(f"Removed {removed} OCR cache entries")
+    return CacheInvalidationResponse(cache="ocr", removed=removed)
+
+
+@app.get("/cache/extraction", response_model=CacheStatsResponse)
+async def extraction_cache_stats():
+    """Hit/miss statistics and size of the LLM extraction cache"""
+    stats = await asyncio.to_thread(lambda: get_extraction_cache().stats())
+    return CacheStatsResponse(cache="extraction", stats=stats)
+
+
+@app.delete("/cache/extraction", response_model=CacheInvalidationResponse)
+async def invalidate_extraction_cache(model: Optional[str] = None):
+    """
+    Invalidate cached extraction results
+    
+    - **model**: Only drop entries produced by this model
+    """
+    removed = await asyncio.to_thread(lambda: get_extraction_cache().invalidate(model))
+    logger.info(f"Removed {removed} extraction cache entries")
+    return CacheInvalidationResponse(cache="extraction", removed=removed)
+
+
+@app.get("/llm/scheduler", response_model=LlmSchedulerStatsResponse)
+async def llm_scheduler_stats():
+    """Queue depth, rate-limit counters and queue-wait percentiles of LLM calls"""
+    stats = await asyncio.to_thread(lambda: get_llm_scheduler().stats())
+    return LlmSchedulerStatsResponse(stats=stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Stage latency histograms and page, failure, cache and in-flight counters
+    in Prometheus text format
+    
+    OCR run on a process pool (OCR_EXECUTOR=process) is timed in the worker
+    processes and does not show up here
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/process-lab-results", response_model=ProcessingResult)
 async def process_lab_results(file: UploadFile = File(...)):
     """
@@ -77,73 +284,14 @@ async def process_lab_results(file: UploadFile = File(...)):
     
     Returns extracted medical data in JSON format
     """
-    start_time = time.time()
-    temp_files = []
+    upload = None
     
     try:
-        # Validate file type
-        if not file.filename or not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(
-                status_code=400, 
-                detail="Only PDF files are supported"
-            )
-        
-        logger.info(f"Processing file: {file.filename}")
-        
-        # Create temporary file for uploaded PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-            temp_files.append(temp_path)
-        
-        logger.info(f"Saved uploaded file to: {temp_path}")
-        
-        # Split PDF into pages
-        logger.info("Splitting PDF into pages...")
-        pages = split_pdf_into_pages(temp_path)
-        temp_files.extend(pages)  # Track page files for cleanup
-        logger.info(f"PDF split into {len(pages)} pages")
-        
-        # Process each page with OCR
-        logger.info("Starting OCR process...")
-        ocr_processor = get_ocr_processor()
-        all_ocr_texts = []
-        
-        for i, page_path in enumerate(pages, 1):
-            logger.info(f"Processing page {i}/{len(pages)}")
-            ocr_result = ocr_processor.process(page_path)
-            if ocr_result:
-                all_ocr_texts.append(ocr_result)
-        
-        logger.info(f"OCR completed for {len(all_ocr_texts)} pages")
-        
-        # Extract lab data from OCR results
-        logger.info("Starting data extraction...")
-        extractor = get_extractor()
-        all_extracted_data = {}
-        
-        for ocr_result in all_ocr_texts:
-            for strategy_name, text in ocr_result.items():
-                if text and text.strip():
-                    logger.info(f"Extracting data using {strategy_name}")
-                    try:
-                        extracted_data = extractor.extract(text)
-                        if extracted_data and isinstance(extracted_data, dict):
-                            all_extracted_data.update(extracted_data)
-                    except Exception as e:
-                        logger.warning(f"Extraction failed for {strategy_name}: {e}")
-        
-        processing_time = time.time() - start_time
-        logger.info(f"Processing completed in {processing_time:.2f} seconds")
-        
-        return ProcessingResult(
-            status="success",
-            filename=file.filename,
-            processed_at=datetime.now().isoformat(),
-            results=all_extracted_data,
-            processing_time=round(processing_time, 2),
-            pages_processed=len(pages)
+        upload = await save_upload(file)
+        executors = await asyncio.to_thread(get_stage_executors)
+        return await executors.arun(
+            "request", run_lab_pipeline, upload.path, file.filename,
+            None, None, upload.sha256
         )
         
     except HTTPException:
@@ -156,48 +304,285 @@ async def process_lab_results(file: UploadFile = File(...)):
         )
     
     finally:
-        # Cleanup temporary files
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-            except Exception as e:
-                logger.warning(f"Failed to cleanup temp file {temp_file}: {e}")
+        if upload:
+            remove_temp_file(upload.path)
+
+
+@app.post("/process-lab-results/stream")
+async def stream_lab_results(file: UploadFile = File(...), format: str = "ndjson"):
+    """
+    Process uploaded PDF file and stream page events while it runs
+    
+    - **file**: PDF file containing lab results
+    - **format**: `ndjson` (one JSON object per line) or `sse` (Server-Sent Events)
+    
+    Emits `page_skipped`, `ocr` and `extraction` events per page as soon as
+    they happen, then a final `summary` event holding the full
+    ProcessingResult, or an `error` event if processing failed
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    upload = await save_upload(file)
+    filename = file.filename
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_event(event: dict):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+    
+    def on_done(_):
+        remove_temp_file(upload.path)
+        loop.call_soon_threadsafe(events.put_nowait, None)
+    
+    try:
+        executors = await asyncio.to_thread(get_stage_executors)
+        future = executors.submit(
+            "request", run_lab_pipeline, upload.path, filename, None, on_event,
+            upload.sha256
+        )
+    except Exception:
+        remove_temp_file(upload.path)
+        raise
+    future.add_done_callback(on_done)
+    
+    async def event_stream():
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield format_stream_event(event, format)
+        try:
+            summary = {"event": "summary", **future.result().dict()}
+        except Exception as e:
+            logger.error(f"Streaming processing error: {str(e)}")
+            summary = {"event": "error", "detail": str(e)}
+        yield format_stream_event(summary, format)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type)
+
+
+def format_stream_event(event: dict, format: str) -> str:
+    """Serialize a pipeline event as an NDJSON line or an SSE message"""
+    data = json.dumps(event, ensure_ascii=False)
+    if format == "sse":
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+@app.post("/jobs", response_model=JobSubmittedResponse, status_code=202)
+async def submit_lab_results_job(file: UploadFile = File(...)):
+    """
+    Queue a PDF file for background processing
+    
+    - **file**: PDF file containing lab results
+    
+    Returns a job ID immediately; poll `GET /jobs/{job_id}` for progress and results
+    """
+    upload = await save_upload(file)
+    filename = file.filename
+    
+    try:
+        job_manager = await asyncio.to_thread(get_job_manager)
+        job = job_manager.submit(
+            filename=filename,
+            stages=LabPipeline.STAGES,
+            func=lambda progress: run_lab_pipeline(
+                upload.path, filename, progress, sha256=upload.sha256
+            ),
+            on_done=lambda: remove_temp_file(upload.path),
+        )
+    except JobQueueFullError as e:
+        remove_temp_file(upload.path)
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    logger.info(f"Queued job {job.id} for {filename}")
+    # The job may already be running by now; the response reports submission
+    return JobSubmittedResponse(
+        job_id=job.id,
+        status="queued",
+        status_url=f"/jobs/{job.id}"
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """Return status, per-stage progress and, once finished, the result of a job"""
+    job_manager = await asyncio.to_thread(get_job_manager)
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_response()
+
+
+@dataclass
+class SavedUpload:
+    """An uploaded PDF copied to a temporary file"""
+    path: str
+    sha256: str
+    size: int
+    pages: int
+
+
+async def save_upload(file: UploadFile) -> SavedUpload:
+    """
+    Validate the uploaded PDF and stream it to a temporary file
+    
+    The upload is copied in UPLOAD_CHUNK_BYTES chunks and hashed on the way,
+    so memory use does not grow with the file size. Files over MAX_UPLOAD_MB
+    or MAX_UPLOAD_PAGES are rejected with 413 as soon as the limit is known;
+    UploadSizeLimitMiddleware already refuses requests too large to hold
+    an acceptable file before they are parsed.
+    Disk writes and the page count run in worker threads: counting pages
+    parses the PDF under fitz_lock, which would otherwise stall the event
+    loop while other threads split or merge documents
+    """
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(
+            status_code=400, 
+            detail="Only PDF files are supported"
+        )
+    
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {MAX_UPLOAD_MB:g} MB upload limit"
+        )
+    
+    logger.info(f"Processing file: {file.filename}")
+    
+    start_time = time.time()
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+        temp_path = temp_file.name
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {MAX_UPLOAD_MB:g} MB upload limit"
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(temp_file.write, chunk)
+        except BaseException:
+            temp_file.close()
+            remove_temp_file(temp_path)
+            raise
+    
+    pages = await asyncio.to_thread(get_pdf_page_count, temp_path)
+    if pages == 0:
+        remove_temp_file(temp_path)
+        raise HTTPException(status_code=400, detail="Invalid or empty PDF file")
+    if pages > MAX_UPLOAD_PAGES:
+        remove_temp_file(temp_path)
+        raise HTTPException(
+            status_code=413,
+            detail=f"PDF has {pages} pages, the limit is {MAX_UPLOAD_PAGES}"
+        )
+    
+    stage_seconds.observe(time.time() - start_time, stage="upload")
+    logger.info(f"Saved uploaded file to: {temp_path} ({size} bytes, {pages} pages)")
+    return SavedUpload(path=temp_path, sha256=digest.hexdigest(), size=size, pages=pages)
+
+
+def run_lab_pipeline(
+    pdf_path: str,
+    filename: str,
+    progress: Optional[ProgressCallback] = None,
+    on_event: Optional[EventCallback] = None,
+    sha256: Optional[str] = None
+) -> ProcessingResult:
+    """Run OCR and extraction on a saved PDF and build the API result"""
+    def log_progress(stage: str, done: int, total: int):
+        if done == 0:
+            logger.info(f"Starting {stage} for {filename} ({total} items)")
+        if progress is not None:
+            progress(stage, done, total)
+    
+    with documents_in_flight.track_in_progress():
+        pipeline_result = get_pipeline().run(
+            pdf_path, progress=log_progress, on_event=on_event
+        )
+    logger.info(
+        f"Processing completed in {pipeline_result.processing_time:.2f} seconds"
+    )
+    
+    return ProcessingResult(
+        status="success",
+        filename=filename,
+        processed_at=datetime.now().isoformat(),
+        results=pipeline_result.results,
+        processing_time=round(pipeline_result.processing_time, 2),
+        pages_processed=pipeline_result.pages_processed,
+        skipped_pages=pipeline_result.skipped_pages,
+        sha256=sha256
+    )
+
+
+def remove_temp_file(temp_path: str):
+    """Remove a temporary upload, logging instead of raising on failure"""
+    try:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    except Exception as e:
+        logger.warning(f"Failed to cleanup temp file {temp_path}: {e}")
 
 
 @app.post("/batch-process", response_model=List[ProcessingResult])
 async def batch_process_lab_results(files: List[UploadFile] = File(...)):
     """
-    Process multiple PDF files in batch
+    Process multiple PDF files concurrently
     
-    - **files**: List of PDF files containing lab results
+    - **files**: List of PDF files containing lab results (at most BATCH_MAX_FILES,
+      MAX_BATCH_UPLOAD_MB in total)
     
-    Returns list of extracted medical data for each file
+    Files run at the same time on the shared request workers, and the pages
+    of every running file take turns on the OCR and extraction workers, so
+    a long report does not hold up the short ones. Returns the extracted
+    data for each file in upload order, with its processing and queue time
     """
-    if len(files) > 10:  # Limit batch size
+    if len(files) > BATCH_MAX_FILES:
         raise HTTPException(
             status_code=400,
-            detail="Maximum 10 files allowed per batch"
+            detail=f"Maximum {BATCH_MAX_FILES} files allowed per batch"
         )
     
-    results = []
-    for file in files:
+    # Files of one batch share a turn on the request workers with other requests
+    batch = object()
+    
+    async def process_file(file: UploadFile) -> ProcessingResult:
+        start_time = time.time()
+        upload = None
         try:
-            # Process each file individually
-            result = await process_lab_results(file)
-            results.append(result)
+            upload = await save_upload(file)
+            executors = await asyncio.to_thread(get_stage_executors)
+            result = await executors.arun(
+                "request", run_lab_pipeline, upload.path, file.filename,
+                None, None, upload.sha256, owner=batch
+            )
+            result.queue_time = round(
+                max(time.time() - start_time - result.processing_time, 0), 2
+            )
+            return result
         except Exception as e:
-            # Add error result for failed files
-            results.append(ProcessingResult(
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Batch processing error for {file.filename}: {detail}")
+            return ProcessingResult(
                 status="error",
                 filename=file.filename or "unknown",
                 processed_at=datetime.now().isoformat(),
-                results={"error": str(e)},
-                processing_time=0,
+                results={"error": detail},
+                processing_time=round(time.time() - start_time, 2),
                 pages_processed=0
-            ))
+            )
+        finally:
+            if upload:
+                remove_temp_file(upload.path)
     
-    return results
+    return await asyncio.gather(*(process_file(file) for file in files))
 
 
 @app.exception_handler(HTTPException)
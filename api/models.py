@@ -1,9 +1,15 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
 
+class SkippedPage(BaseModel):
+    """A page left out of OCR and extraction"""
+    page: int = Field(..., description="1-based page number")
+    reason: str = Field(..., description="Why the page was skipped (e.g. no_lab_content)")
+
+
 class ProcessingResult(BaseModel):
     """Response model for processed lab results"""
     status: str = Field(..., description="Processing status (success/error)")
@@ -11,7 +17,38 @@ class ProcessingResult(BaseModel):
     processed_at: str = Field(..., description="Processing timestamp")
     results: Dict[str, Any] = Field(..., description="Extracted lab data")
     processing_time: Optional[float] = Field(None, description="Processing time in seconds")
-    pages_processed: Optional[int] = Field(None, description="Number of pages processed")
+    queue_time: Optional[float] = Field(
+        None, description="Seconds spent waiting for a worker before processing (batches only)"
+    )
+    pages_processed: Optional[int] = Field(
+        None, description="Number of pages processed, not counting skipped pages"
+    )
+    skipped_pages: List[SkippedPage] = Field(
+        default_factory=list, description="Pages skipped as not containing lab results"
+    )
+    sha256: Optional[str] = Field(None, description="SHA-256 of the uploaded file")
+
+
+class JobSubmittedResponse(BaseModel):
+    """Response model for a newly submitted processing job"""
+    job_id: str = Field(..., description="Identifier used to poll the job")
+    status: str = Field(..., description="Initial job status (queued)")
+    status_url: str = Field(..., description="URL returning the job status")
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for the status of a processing job"""
+    job_id: str = Field(..., description="Job identifier")
+    filename: str = Field(..., description="Original filename")
+    status: str = Field(..., description="Job status (queued/running/completed/failed)")
+    submitted_at: str = Field(..., description="Submission timestamp")
+    started_at: Optional[str] = Field(None, description="Processing start timestamp")
+    finished_at: Optional[str] = Field(None, description="Processing end timestamp")
+    progress: Dict[str, Dict[str, int]] = Field(
+        ..., description="Per-stage progress as done/total counts"
+    )
+    result: Optional[ProcessingResult] = Field(None, description="Final result once completed")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
 
 
 class HealthResponse(BaseModel):
@@ -21,6 +58,30 @@ class HealthResponse(BaseModel):
     version: str = Field(default="1.0.0", description="API version")
 
 
+class ModelStatsResponse(BaseModel):
+    """Shared OCR model registry statistics"""
+    marker: Dict[str, Any] = Field(..., description="Marker model load time and memory footprint")
+
+
+class LlmSchedulerStatsResponse(BaseModel):
+    """LLM request queue statistics"""
+    stats: Dict[str, Any] = Field(
+        ..., description="Rate limits, queue depth, call counters and queue-wait percentiles"
+    )
+
+
+class CacheStatsResponse(BaseModel):
+    """Cache statistics response model"""
+    cache: str = Field(..., description="Cache name")
+    stats: Dict[str, Any] = Field(..., description="Size, hit/miss and eviction statistics")
+
+
+class CacheInvalidationResponse(BaseModel):
+    """Cache invalidation response model"""
+    cache: str = Field(..., description="Cache name")
+    removed: int = Field(..., description="Number of entries removed")
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     status: str = Field(default="error", description="Response status")
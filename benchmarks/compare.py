@@ -0,0 +1,65 @@
+import argparse
+import json
+import sys
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.2) -> list[dict]:
+    """
+    Compares the median timings of two benchmark runs.
+
+    Args:
+        baseline: Results of the reference run, as written by `benchmarks.run`.
+        current: Results of the run under test.
+        threshold: Relative slowdown of the median (0.2 = 20%) that counts
+            as a regression.
+
+    Returns:
+        One row per benchmark present in both runs, with both medians, their
+        ratio and whether it is a regression, slowest ratio first.
+    """
+    rows = []
+    for name, stats in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None or not base["median"]:
+            continue
+        ratio = stats["median"] / base["median"]
+        rows.append({
+            "name": name,
+            "baseline": base["median"],
+            "current": stats["median"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        })
+    return sorted(rows, key=lambda row: row["ratio"], reverse=True)
+
+
+def print_comparison(rows: list[dict]) -> None:
+    width = max((len(row["name"]) for row in rows), default=10)
+    print(f"{'benchmark':<{width}}  {'baseline ms':>12}  {'current ms':>12}  {'ratio':>7}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['name']:<{width}}  {row['baseline'] * 1000:>12.2f}  "
+            f"{row['current'] * 1000:>12.2f}  {row['ratio']:>7.2f}{flag}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", help="Results JSON of the reference commit")
+    parser.add_argument("current", help="Results JSON of the commit under test")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative median slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.threshold)
+    print_comparison(rows)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
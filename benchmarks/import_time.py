@@ -0,0 +1,66 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# What the service and the CLI import at startup
+DEFAULT_MODULES = ["api.main", "src.pipeline.runner", "src.ocr.processor", "src.extraction.extractor"]
+# Dependencies that should only load once a request needs them
+HEAVY_MODULES = ["torch", "marker", "dspy", "litellm", "mistralai"]
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "heavy_loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 3) -> dict:
+    """
+    Imports `module` in `repeat` fresh interpreters and reports the median
+    import time, the peak RSS and which heavy dependencies it loaded.
+    """
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True, env=os.environ.copy(),
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    durations = sorted(run["seconds"] for run in runs)
+    return {
+        "runs": repeat,
+        "min": round(durations[0], 6),
+        "median": round(statistics.median(durations), 6),
+        "max": round(durations[-1], 6),
+        "max_rss_mb": round(max(run["max_rss_kb"] for run in runs) / 1024, 1),
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the import cost of the service modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        stats = measure_import(module, args.repeat)
+        heavy = ", ".join(stats["heavy_loaded"]) or "none"
+        print(
+            f"{module}: {stats['median'] * 1000:.0f} ms, {stats['max_rss_mb']} MiB RSS, "
+            f"heavy dependencies loaded: {heavy}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import httpx
+
+from benchmarks.synthetic import make_lab_report
+
+
+def read_rss_bytes(pid: int) -> int:
+    """Resident set size of a process, from /proc."""
+    with open(f"/proc/{pid}/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def process_tree(pid: int) -> list[int]:
+    """A process and all its descendants, such as uvicorn's workers."""
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name may hold spaces, so parse after its ")"
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    tree = [pid]
+    for current in tree:
+        tree.extend(children.get(current, []))
+    return tree
+
+
+def read_tree_rss_bytes(pid: int) -> int:
+    total = 0
+    for member in process_tree(pid):
+        try:
+            total += read_rss_bytes(member)
+        except OSError:
+            pass
+    return total
+
+
+class RssSampler:
+    """
+    Samples the RSS of a process and its descendants in a background
+    thread and keeps the peak.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.start_bytes = read_tree_rss_bytes(pid)
+        self.peak_bytes = self.start_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.peak_bytes = max(self.peak_bytes, read_tree_rss_bytes(self.pid))
+            except OSError:
+                return
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def start_stub_server(
+    mistral_latency: float,
+    llm_latency: float,
+    pages: int,
+    workers: int = 1,
+    startup_timeout: float = 120.0,
+) -> tuple[str, subprocess.Popen]:
+    """
+    Serves the app of `benchmarks.stub_server` with stubbed OCR and LLM
+    backends from `workers` uvicorn worker processes on a free local port.
+    The server runs apart from the load generator, so they share neither
+    a GIL nor an RSS.
+
+    Returns:
+        The base URL and the server process (terminate it to stop).
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        "STUB_MISTRAL_LATENCY": str(mistral_latency),
+        "STUB_LLM_LATENCY": str(llm_latency),
+        "STUB_PAGES": str(pages),
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.stub_server:create_app", "--factory",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Stub server exited with code {server.returncode}")
+        with contextlib.suppress(httpx.HTTPError):
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return base_url, server
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f"Stub server did not start within {startup_timeout:g}s")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(fraction * len(values)), len(values) - 1)], 4)
+
+
+def summarize(samples: list[dict], elapsed: float) -> dict:
+    """Throughput, latency percentiles and error rate of a group of requests."""
+    latencies = [sample["seconds"] for sample in samples if sample["ok"]]
+    errors = sum(1 for sample in samples if not sample["ok"])
+    documents = sum(sample["documents"] for sample in samples if sample["ok"])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "requests_per_second": round(len(latencies) / elapsed, 3),
+        "documents_per_second": round(documents / elapsed, 3),
+        "latency": {
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": round(max(latencies), 4) if latencies else None,
+        },
+    }
+
+
+async def generate_load(
+    base_url: str,
+    pdf: bytes,
+    rate: float,
+    duration: float,
+    batch_ratio: float,
+    batch_size: int,
+    timeout: float,
+) -> tuple[list[dict], float]:
+    """
+    Sends uploads at a fixed arrival rate, whether or not earlier ones have
+    finished (open loop), so queueing in the service shows up as latency.
+    Batch requests are spread evenly among single ones at `batch_ratio`.
+
+    Returns:
+        One sample per request (kind, ok, status, seconds, documents) and
+        the wall-clock time until the last response.
+    """
+    samples: list[dict] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def send(kind: str) -> None:
+            if kind == "batch":
+                url = "/batch-process"
+                files = [("files", (f"report_{i}.pdf", pdf, "application/pdf")) for i in range(batch_size)]
+                documents = batch_size
+            else:
+                url = "/process-lab-results"
+                files = {"file": ("report.pdf", pdf, "application/pdf")}
+                documents = 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, files=files)
+                status = response.status_code
+                ok = status == 200
+                if ok and kind == "batch":
+                    ok = all(result["status"] == "success" for result in response.json())
+            except httpx.HTTPError as e:
+                status, ok = type(e).__name__, False
+            samples.append({
+                "kind": kind,
+                "ok": ok,
+                "status": status,
+                "seconds": time.perf_counter() - start,
+                "documents": documents,
+            })
+
+        tasks = []
+        start = time.perf_counter()
+        for i in range(max(int(rate * duration), 1)):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = "batch" if int((i + 1) * batch_ratio) > int(i * batch_ratio) else "single"
+            tasks.append(asyncio.create_task(send(kind)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Load test the lab results API with synthetic uploads."
+    )
+    parser.add_argument("--url", help="Base URL of a running service; by default a server "
+                        "with stubbed OCR and LLM backends is started in a subprocess")
+    parser.add_argument("--pid", type=int,
+                        help="PID of the --url service, to sample its RSS and its workers'")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes of the stubbed server")
+    parser.add_argument("--rate", type=float, default=2.0, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--batch-ratio", type=float, default=0.1,
+                        help="Fraction of requests sent to /batch-process")
+    parser.add_argument("--batch-size", type=int, default=5, help="Files per batch request")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per synthetic report")
+    parser.add_argument("--scanned", action="store_true",
+                        help="Upload image-only reports instead of text-layer ones")
+    parser.add_argument("--mistral-latency", type=float, default=0.5,
+                        help="Seconds each stubbed Mistral request takes")
+    parser.add_argument("--llm-latency", type=float, default=1.0,
+                        help="Seconds each stubbed LLM call takes")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout")
+    parser.add_argument("--output", help="Where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    pdf = make_lab_report(args.pages, image_only=args.scanned)
+    server = None
+    if args.url:
+        base_url, rss_pid = args.url, args.pid
+    else:
+        base_url, server = start_stub_server(
+            args.mistral_latency, args.llm_latency, args.pages, args.workers
+        )
+        rss_pid = server.pid
+
+    print(
+        f"Sending {args.rate:g} req/s for {args.duration:g}s to {base_url} "
+        f"({args.batch_ratio:.0%} batches of {args.batch_size}, {args.pages}-page reports)"
+    )
+    sampling = RssSampler(rss_pid) if rss_pid is not None else contextlib.nullcontext()
+    try:
+        with sampling as sampler:
+            samples, elapsed = asyncio.run(
+                generate_load(
+                    base_url, pdf, args.rate, args.duration,
+                    args.batch_ratio, args.batch_size, args.timeout,
+                )
+            )
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "url": args.url or f"{base_url} (stubbed backends)",
+            "settings": {
+                key: value for key, value in vars(args).items() if key not in ("url", "output")
+            },
+            "stage_workers": {
+                stage: os.getenv(f"STAGE_WORKERS_{stage.upper()}") for stage in ("request", "ocr", "extraction")
+            },
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": summarize(samples, elapsed),
+        "by_kind": {
+            kind: summarize([sample for sample in samples if sample["kind"] == kind], elapsed)
+            for kind in ("single", "batch")
+        },
+        "status_codes": {
+            str(status): sum(1 for sample in samples if sample["status"] == status)
+            for status in {sample["status"] for sample in samples}
+        },
+    }
+    if sampler is not None:
+        report["rss"] = {
+            "start_mb": round(sampler.start_bytes / 2**20, 1),
+            "peak_mb": round(sampler.peak_bytes / 2**20, 1),
+        }
+
+    print(json.dumps(report["overall"], indent=2))
+    for kind, summary in report["by_kind"].items():
+        if not summary["requests"]:
+            continue
+        latency = summary["latency"]
+        print(
+            f"{kind:>6}: {summary['requests']} requests, {summary['errors']} errors, "
+            f"p50 {latency['p50']}s, p95 {latency['p95']}s, p99 {latency['p99']}s"
+        )
+    if "rss" in report:
+        print(f"RSS: {report['rss']['start_mb']} MiB at start, {report['rss']['peak_mb']} MiB peak")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
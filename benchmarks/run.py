@@ -0,0 +1,223 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable
+
+# Stubbed backends still build real clients, which want a key to exist
+os.environ.setdefault("MISTRAL_API_KEY", "offline-benchmark")
+os.environ.setdefault("OPENROUTER_API_KEY", "offline-benchmark")
+
+from benchmarks.compare import compare_results, print_comparison
+from benchmarks.import_time import DEFAULT_MODULES, measure_import
+from benchmarks.stubs import stub_extractor, stub_mistral_strategy, stub_ocr_processor
+from benchmarks.synthetic import make_lab_report, report_text
+from src.extraction.rules import RuleBasedExtractor
+from src.ocr.relevance import PageRelevanceFilter
+from src.ocr.strategies import MarkerOcrStrategy, PyMuPdfOcrStrategy
+from src.pipeline.executors import StageExecutors
+from src.pipeline.runner import LabPipeline
+from src.utils.file_utils import find_medical_terms, iter_pdf_pages, open_pdf, split_pdf_into_pages
+
+
+def time_call(fn: Callable[[], object], repeat: int, warmup: int = 1) -> dict:
+    """
+    Times `fn` `repeat` times after `warmup` untimed calls.
+
+    Returns:
+        Wall-clock statistics in seconds: min, median, mean, p95 and max.
+    """
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        "runs": repeat,
+        "min": round(durations[0], 6),
+        "median": round(statistics.median(durations), 6),
+        "mean": round(statistics.fmean(durations), 6),
+        "p95": round(durations[min(int(0.95 * repeat), repeat - 1)], 6),
+        "max": round(durations[-1], 6),
+    }
+
+
+def read_pages(data: bytes) -> list[bytes]:
+    doc = open_pdf(data)
+    try:
+        return list(iter_pdf_pages(doc))
+    finally:
+        doc.close()
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    page_counts: list[int],
+    repeat: int,
+    llm_latency: float = 0.0,
+    mistral_latency: float = 0.0,
+    include_marker: bool = False,
+) -> dict:
+    """
+    Times every pipeline stage on synthetic reports with stubbed backends.
+
+    Each report size is generated with a text layer ("text") and as page
+    images only ("scanned"). Text-only stages (term search, rules, LLM
+    extraction) run on the text variant alone, since the stubbed OCR gives
+    both variants the same text. The import time of the startup modules
+    is measured in fresh interpreters.
+
+    Returns:
+        A dict with run metadata and, per benchmark name, its timing
+        statistics and page count.
+    """
+    strategies = {"PyMuPdfOcrStrategy": PyMuPdfOcrStrategy()}
+    if include_marker:
+        strategies["MarkerOcrStrategy"] = MarkerOcrStrategy()
+    rules = RuleBasedExtractor()
+    extractor = stub_extractor(llm_latency)
+    benchmarks = {}
+
+    def bench(name: str, pages: int, fn: Callable[[], object]) -> None:
+        print(f"{name} ...", end=" ", flush=True)
+        # Keep the stages' own progress prints out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = time_call(fn, repeat)
+        stats["pages"] = pages
+        stats["median_per_page"] = round(stats["median"] / pages, 6)
+        benchmarks[name] = stats
+        print(f"{stats['median'] * 1000:.2f} ms")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for variant in ("text", "scanned"):
+            for page_count in page_counts:
+                case = f"{variant}-{page_count}p"
+                data = make_lab_report(page_count, image_only=variant == "scanned")
+                texts = report_text(page_count)
+                pdf_path = os.path.join(work_dir, f"{case}.pdf")
+                with open(pdf_path, "wb") as f:
+                    f.write(data)
+                pages = read_pages(data)
+
+                bench(
+                    f"split_pdf_into_pages/{case}",
+                    page_count,
+                    lambda: split_pdf_into_pages(pdf_path, os.path.join(work_dir, f"{case}_pages")),
+                )
+                bench(f"iter_pdf_pages/{case}", page_count, lambda: read_pages(data))
+
+                mistral = stub_mistral_strategy(mistral_latency, scanned_text=texts[0])
+                for name, strategy in {**strategies, "MistralOcrStrategy": mistral}.items():
+                    bench(
+                        f"ocr/{name}/{case}",
+                        page_count,
+                        lambda strategy=strategy: [strategy.execute_bytes(page) for page in pages],
+                    )
+
+                if variant == "text":
+                    bench(
+                        f"find_medical_terms/{case}",
+                        page_count,
+                        lambda: [find_medical_terms(text) for text in texts],
+                    )
+                    bench(
+                        f"rules/{case}", page_count, lambda: [rules.extract(text) for text in texts]
+                    )
+                    bench(
+                        f"extraction/{case}",
+                        page_count,
+                        lambda: [extractor.extract(text, use_cache=False) for text in texts],
+                    )
+
+                executors = StageExecutors()
+                pipeline = LabPipeline(
+                    stub_ocr_processor(mistral_latency, scanned_text=texts[0]),
+                    extractor,
+                    executors,
+                    page_filter=PageRelevanceFilter(),
+                )
+                try:
+                    bench(f"pipeline/{case}", page_count, lambda: pipeline.run(data))
+                finally:
+                    executors.shutdown()
+
+    for module in DEFAULT_MODULES:
+        print(f"import/{module} ...", end=" ", flush=True)
+        benchmarks[f"import/{module}"] = measure_import(module, repeat)
+        print(f"{benchmarks[f'import/{module}']['median'] * 1000:.2f} ms")
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "page_counts": page_counts,
+            "repeat": repeat,
+            "llm_latency": llm_latency,
+            "mistral_latency": mistral_latency,
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks of every pipeline stage on synthetic lab reports."
+    )
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20],
+                        help="Report sizes to generate, in pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Seconds each stubbed LLM call sleeps")
+    parser.add_argument("--mistral-latency", type=float, default=0.0,
+                        help="Seconds each stubbed Mistral OCR request sleeps")
+    parser.add_argument("--marker", action="store_true",
+                        help="Also time Marker (needs its models downloaded; slow)")
+    parser.add_argument("--output", default="results/benchmarks.json",
+                        help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative median slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.pages, args.repeat, args.llm_latency, args.mistral_latency, args.marker
+    )
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, results, args.threshold)
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import os
+
+# The stubbed service must not reuse results across requests or need keys
+os.environ.setdefault("OCR_CACHE_ENABLED", "false")
+os.environ.setdefault("EXTRACTION_CACHE_ENABLED", "false")
+os.environ.setdefault("MISTRAL_API_KEY", "offline-benchmark")
+os.environ.setdefault("OPENROUTER_API_KEY", "offline-benchmark")
+
+from benchmarks.stubs import stub_extractor, stub_ocr_processor
+from benchmarks.synthetic import report_text
+
+
+def create_app():
+    """
+    App factory serving `api.main:app` with stubbed OCR and LLM backends,
+    for `uvicorn --factory benchmarks.stub_server:create_app`. Every uvicorn
+    worker calls it once. `STUB_MISTRAL_LATENCY` and `STUB_LLM_LATENCY` set
+    the backend latencies in seconds; `STUB_PAGES` the size of the report
+    whose text scanned pages are given.
+    """
+    import api.main as service
+
+    pages = int(os.getenv("STUB_PAGES", "3"))
+    service._ocr_processor = stub_ocr_processor(
+        float(os.getenv("STUB_MISTRAL_LATENCY", "0.5")),
+        scanned_text=report_text(pages)[0],
+    )
+    service._extractor = stub_extractor(float(os.getenv("STUB_LLM_LATENCY", "1.0")))
+    return service.app
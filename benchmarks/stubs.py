@@ -0,0 +1,101 @@
+import asyncio
+import base64
+import time
+from types import SimpleNamespace
+
+import dspy
+import fitz  # pymupdf
+
+from src.extraction.extractor import LabDataExtractor
+from src.extraction.rules import RuleBasedExtractor
+from src.ocr.processor import OcrProcessor
+from src.ocr.strategies import MistralOcrStrategy
+from src.utils.file_utils import fitz_lock
+
+
+class StubMistralClient:
+    """
+    Offline stand-in for `Mistral` that answers `ocr.process` locally.
+
+    Each page's markdown is its text layer, or `scanned_text` for pages
+    without one, returned after `latency` seconds per request.
+    """
+
+    def __init__(self, latency: float = 0.0, scanned_text: str = ""):
+        self.latency = latency
+        self.scanned_text = scanned_text
+        self.ocr = SimpleNamespace(process=self.process)
+
+    def process(self, model: str, document: dict, include_image_base64: bool = False):
+        url = document.get("document_url") or document.get("image_url")
+        data = base64.b64decode(url.split(",", 1)[1])
+        time.sleep(self.latency)
+        if "document_url" not in document:
+            return SimpleNamespace(pages=[SimpleNamespace(index=0, markdown=self.scanned_text)])
+        with fitz_lock:
+            doc = fitz.open(stream=data, filetype="pdf")
+            texts = [page.get_text() for page in doc]
+            doc.close()
+        return SimpleNamespace(
+            pages=[
+                SimpleNamespace(index=i, markdown=text if text.strip() else self.scanned_text)
+                for i, text in enumerate(texts)
+            ]
+        )
+
+
+class StubPredictor:
+    """
+    Offline stand-in for a `dspy.Predict` extraction predictor.
+
+    Answers with the rule-based extractor's results after `latency`
+    seconds, so downstream code sees realistic result dicts.
+    """
+
+    def __init__(self, signature, latency: float = 0.0):
+        self.signature = signature
+        self.latency = latency
+        self.rules = RuleBasedExtractor()
+
+    def __call__(self, **inputs) -> dspy.Prediction:
+        time.sleep(self.latency)
+        return dspy.Prediction(results=self._results(inputs))
+
+    async def acall(self, **inputs) -> dspy.Prediction:
+        await asyncio.sleep(self.latency)
+        return dspy.Prediction(results=self._results(inputs))
+
+    def _results(self, inputs: dict):
+        if "page_texts" in inputs:
+            return [self.rules.extract(text).results for text in inputs["page_texts"]]
+        if "document_variants" in inputs:
+            return self.rules.extract("\n".join(inputs["document_variants"])).results
+        return self.rules.extract(inputs["document_text"]).results
+
+
+def stub_extractor(latency: float = 0.0) -> LabDataExtractor:
+    """A LabDataExtractor without cache whose predictors never reach the network."""
+    extractor = LabDataExtractor(cache=None)
+    for attribute in ("extract_lab_data", "extract_lab_data_consensus", "extract_lab_data_batch"):
+        predictor = getattr(extractor, attribute)
+        setattr(extractor, attribute, StubPredictor(predictor.signature, latency))
+    return extractor
+
+
+def stub_mistral_strategy(latency: float = 0.0, scanned_text: str = "") -> MistralOcrStrategy:
+    """A MistralOcrStrategy whose client is a StubMistralClient."""
+    strategy = MistralOcrStrategy()
+    strategy.client = StubMistralClient(latency, scanned_text)
+    return strategy
+
+
+def stub_ocr_processor(
+    mistral_latency: float = 0.0, scanned_text: str = "", mode: str = "parallel"
+) -> OcrProcessor:
+    """
+    An OcrProcessor without cache that runs PyMuPDF and a stubbed Mistral.
+    Marker is left out: it needs its models and dominates every timing.
+    """
+    processor = OcrProcessor(cache=None, mode=mode, strategy_names=["pymupdf", "mistral"])
+    processor._instances[MistralOcrStrategy] = stub_mistral_strategy(mistral_latency, scanned_text)
+    return processor
@@ -0,0 +1,103 @@
+import random
+
+import fitz  # pymupdf
+
+# (name, low, high, unit, reference range) as printed by Brazilian labs
+ANALYTES = [
+    ("Glicose em jejum", 70, 130, "mg/dL", "70 a 99 mg/dL"),
+    ("Hemoglobina", 11, 17, "g/dL", "12,0 a 16,0 g/dL"),
+    ("Hemoglobina glicada (HbA1c)", 4.5, 9.0, "%", "inferior a 5,7 %"),
+    ("Insulina", 2, 30, "µUI/mL", "2,6 a 24,9 µUI/mL"),
+    ("TSH", 0.3, 6.0, "µUI/mL", "0,27 a 4,20 µUI/mL"),
+    ("T4 livre", 0.7, 2.0, "ng/dL", "0,93 a 1,70 ng/dL"),
+    ("Colesterol total", 120, 290, "mg/dL", "inferior a 190 mg/dL"),
+    ("Colesterol HDL", 30, 90, "mg/dL", "superior a 40 mg/dL"),
+    ("Colesterol LDL", 60, 200, "mg/dL", "inferior a 130 mg/dL"),
+    ("Triglicerídeos", 50, 400, "mg/dL", "inferior a 150 mg/dL"),
+    ("TGO", 10, 60, "U/L", "até 40 U/L"),
+    ("TGP", 7, 80, "U/L", "até 41 U/L"),
+    ("Gama-GT", 8, 90, "U/L", "8 a 61 U/L"),
+    ("Creatinina", 0.5, 1.5, "mg/dL", "0,70 a 1,20 mg/dL"),
+    ("Ureia", 15, 55, "mg/dL", "17 a 43 mg/dL"),
+    ("Ferritina", 15, 400, "ng/mL", "30 a 400 ng/mL"),
+    ("Vitamina D (25-OH)", 10, 70, "ng/mL", "superior a 20 ng/mL"),
+    ("Vitamina B12", 180, 900, "pg/mL", "197 a 771 pg/mL"),
+    ("Testosterona total", 250, 900, "ng/dL", "249 a 836 ng/dL"),
+    ("Cortisol matinal", 5, 25, "µg/dL", "6,2 a 19,4 µg/dL"),
+]
+
+# Filler found on real reports: headers, disclaimers and signatures
+FILLER = [
+    "Laboratório de Análises Clínicas - Unidade Centro",
+    "Material: soro. Método: quimioluminescência.",
+    "Resultados liberados eletronicamente. Assinatura digital do responsável técnico.",
+    "A interpretação dos resultados deve ser feita pelo médico solicitante.",
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+LINE_HEIGHT = 14
+
+
+def _format_value(value: float) -> str:
+    text = f"{value:.0f}" if value >= 20 else f"{value:.2f}"
+    return text.replace(".", ",")
+
+
+def page_lines(rng: random.Random, analytes_per_page: int) -> list[str]:
+    """Lines of one report page: a header, some analytes and a signature."""
+    lines = [rng.choice(FILLER), f"Paciente: PACIENTE {rng.randint(1000, 9999)}", ""]
+    for name, low, high, unit, reference in rng.sample(ANALYTES, analytes_per_page):
+        lines.append(f"{name}: {_format_value(rng.uniform(low, high))} {unit}")
+        lines.append(f"Valores de referência: {reference}")
+        lines.append("")
+    lines.append(rng.choice(FILLER))
+    return lines
+
+
+def make_lab_report(
+    page_count: int,
+    image_only: bool = False,
+    analytes_per_page: int = 8,
+    seed: int = 0,
+) -> bytes:
+    """
+    Generates a synthetic lab report PDF.
+
+    Args:
+        page_count: Number of pages.
+        image_only: Render every page to a bitmap, like a scanned report
+            without a text layer.
+        analytes_per_page: Lab results printed on each page.
+        seed: Seed for the analytes and values, so runs are comparable.
+
+    Returns:
+        The PDF bytes.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(page_count):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = 60
+        for line in page_lines(rng, analytes_per_page):
+            page.insert_text((50, y), line, fontsize=10)
+            y += LINE_HEIGHT
+
+    if image_only:
+        scanned = fitz.open()
+        for page in doc:
+            pixmap = page.get_pixmap(dpi=150)
+            scanned.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT).insert_image(
+                page.rect, pixmap=pixmap
+            )
+        doc.close()
+        doc = scanned
+
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def report_text(page_count: int, analytes_per_page: int = 8, seed: int = 0) -> list[str]:
+    """The text printed on each page of `make_lab_report` with the same arguments."""
+    rng = random.Random(seed)
+    return ["\n".join(page_lines(rng, analytes_per_page)) for _ in range(page_count)]
@@ -6,9 +6,12 @@ from datetime import datetime
 from dotenv import load_dotenv
 from tqdm import tqdm
 
+from src.extraction.cache import create_extraction_cache
 from src.extraction.extractor import LabDataExtractor
-from src.ocr.processor import OcrProcessor
-from src.utils.file_utils import split_pdf_into_pages
+from src.extraction.scheduler import create_llm_scheduler
+from src.ocr.processor import create_ocr_processor
+from src.pipeline.executors import create_stage_executors
+from src.pipeline.runner import create_lab_pipeline
 
 
 def format_time_delta(seconds: float) -> str:
@@ -35,39 +38,46 @@ def main(file_path: str):
         return
 
     start_time = time.time()
-
-    # --- Split PDF into pages ---
-    print(f"{format_timestamp(start_time)} - Splitting PDF into pages...")
-    pages = split_pdf_into_pages(file_path)
-    split_time = time.time()
-    print(f"PDF split into {len(pages)} pages in {format_time_delta(split_time - start_time)}.")
-
-    # --- OCR Step ---
-    print(f"{format_timestamp(split_time)} - Starting OCR process for each page...")
-    ocr_processor = OcrProcessor()
-    all_ocr_texts = []
-    
-    for page_path in tqdm(pages, desc="Processing pages for OCR"):
-        ocr_result = ocr_processor.process(page_path)
-        all_ocr_texts.append(ocr_result)
-        
-    ocr_time = time.time()
-    print(f"{format_timestamp(ocr_time)} - OCR process finished in {format_time_delta(ocr_time - split_time)}.")
-
-    # --- Extraction Step ---
-    print("Starting data extraction...")
-    extractor = LabDataExtractor()
-    all_extracted_data = {}
-
-    for ocr_result in tqdm(all_ocr_texts, desc="Processing OCR results"):
-        for strategy in tqdm(ocr_result.keys(), desc="Processing strategies"):
-            extracted_data = extractor.extract(ocr_result[strategy])
-            if extracted_data:
-                all_extracted_data.update(extracted_data)
-
-    extract_time = time.time()
-    print(f"{format_timestamp(extract_time)} - Extraction finished in {format_time_delta(extract_time - ocr_time)}.")
-
+    print(f"{format_timestamp(start_time)} - Starting pipeline for {file_path}...")
+
+    executors = create_stage_executors()
+    pipeline = create_lab_pipeline(
+        create_ocr_processor(),
+        LabDataExtractor(cache=create_extraction_cache(), scheduler=create_llm_scheduler()),
+        executors,
+    )
+
+    # --- Split, OCR and extraction, with pages processed concurrently ---
+    progress_bars = {}
+    stage_start_times = {}
+    stage_end_times = {}
+
+    def report_progress(stage: str, done: int, total: int):
+        # Totals grow while pages stream in, so a stage is only known to be
+        # finished once the whole run has returned
+        if stage not in progress_bars:
+            stage_start_times[stage] = time.time()
+            progress_bars[stage] = tqdm(total=total, desc=f"Pipeline stage: {stage}")
+        bar = progress_bars[stage]
+        bar.total = total
+        bar.n = done
+        bar.refresh()
+        stage_end_times[stage] = time.time()
+
+    try:
+        pipeline_result = pipeline.run(file_path, progress=report_progress)
+    finally:
+        executors.shutdown()
+        for bar in progress_bars.values():
+            bar.close()
+    for stage, stage_end in stage_end_times.items():
+        print(
+            f"{format_timestamp(stage_end)} - {stage} finished in "
+            f"{format_time_delta(stage_end - stage_start_times[stage])}."
+        )
+    all_extracted_data = pipeline_result.results
+    for skipped in pipeline_result.skipped_pages:
+        print(f"Skipped page {skipped['page']}: {skipped['reason']}")
 
     # --- Save to JSON ---
     if all_extracted_data:
@@ -0,0 +1,81 @@
+from typing import Callable
+
+# Rough characters per token for Portuguese lab text; errs on the safe side
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used to pack batches without a tokenizer."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(texts: list[str], token_budget: int) -> list[list[int]]:
+    """
+    Packs consecutive texts into batches whose estimated tokens stay within
+    `token_budget`. A text larger than the budget gets a batch of its own.
+
+    Args:
+        texts: Page texts, in page order.
+        token_budget: Maximum estimated tokens of page text per batch.
+
+    Returns:
+        The batches as lists of indices into `texts`, in order.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def is_unmappable_response(exc: Exception) -> bool:
+    """
+    Whether an extraction failed because its response could not be parsed
+    or mapped back to its pages, rather than because the provider failed.
+    DSPy's parse error is matched by name so this module stays DSPy-free.
+    """
+    return isinstance(exc, ValueError) or type(exc).__name__ == "AdapterParseError"
+
+
+def extract_in_batches(
+    extract_batch: Callable[[list[str]], list[dict]],
+    extract_page: Callable[[str], dict],
+    page_texts: list[str],
+) -> list[dict]:
+    """
+    Extracts a batch of page texts in one call, splitting it in halves and
+    retrying whenever the response can't be mapped back to its pages. A
+    single page goes through `extract_page`, the regular one-page path.
+    Provider failures (timeouts, open circuit breaker, HTTP errors) are
+    raised at once, since smaller batches would only call the failing
+    provider more often.
+
+    Args:
+        extract_batch: Multi-page extraction, e.g. `LabDataExtractor.extract_batch`.
+        extract_page: Single-page extraction that handles its own failures.
+        page_texts: Page texts, in page order.
+
+    Returns:
+        One results dict per page, aligned with `page_texts`.
+    """
+    if len(page_texts) == 1:
+        return [extract_page(page_texts[0])]
+
+    try:
+        return extract_batch(page_texts)
+    except Exception as e:
+        if not is_unmappable_response(e):
+            raise
+        middle = len(page_texts) // 2
+        print(f"Batch of {len(page_texts)} pages failed ({e}), splitting")
+        return extract_in_batches(
+            extract_batch, extract_page, page_texts[:middle]
+        ) + extract_in_batches(extract_batch, extract_page, page_texts[middle:])
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import re
+import unicodedata
+
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import cache_requests_total
+
+
+def normalize_document_text(document_text: str) -> str:
+    """
+    Normalizes OCR text so that formatting-only differences share a cache entry.
+    Applies Unicode NFC and collapses every run of whitespace into one space.
+    """
+    text = unicodedata.normalize("NFC", document_text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def signature_fingerprint(signature) -> str:
+    """
+    Describes a DSPy signature by its instructions and fields, so editing a
+    prompt or an output description changes every cache key built from it.
+    """
+    parts = [signature.__name__, signature.instructions]
+    for name, field in signature.fields.items():
+        desc = (field.json_schema_extra or {}).get("desc")
+        parts.append(f"{name}:{field.annotation}:{desc}")
+    return "\n".join(parts)
+
+
+class ExtractionCache:
+    """
+    Persistent cache of LLM extraction results.
+
+    Entries are keyed by the normalized document text, the signature
+    fingerprint and the model name.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float | None = None):
+        self.store = DiskCache(directory, max_bytes, ttl=ttl)
+
+    @staticmethod
+    def make_key(document_text: str, signature, model: str) -> str:
+        digest = hashlib.sha256(normalize_document_text(document_text).encode("utf-8"))
+        digest.update(b"\0" + signature_fingerprint(signature).encode("utf-8"))
+        digest.update(b"\0" + model.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, document_text: str, signature, model: str) -> dict | None:
+        entry = self.store.get(self.make_key(document_text, signature, model))
+        cache_requests_total.inc(cache="extraction", result="hit" if entry else "miss")
+        return entry["results"] if entry else None
+
+    def set(self, document_text: str, signature, model: str, results: dict) -> None:
+        self.store.set(
+            self.make_key(document_text, signature, model),
+            {"signature": signature.__name__, "model": model, "results": results},
+        )
+
+    def invalidate(self, model: str | None = None) -> int:
+        """
+        Removes cached extraction results.
+
+        Args:
+            model: Only remove entries produced by this model.
+                If None, the whole cache is cleared.
+
+        Returns:
+            The number of entries removed.
+        """
+        if model is None:
+            return self.store.clear()
+        return self.store.delete_where(lambda entry: entry.get("model") == model)
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+def create_extraction_cache() -> ExtractionCache | None:
+    """
+    Creates the extraction cache configured from the environment, or None when
+    `EXTRACTION_CACHE_ENABLED` is false.
+    """
+    if os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    ttl_hours = float(os.getenv("EXTRACTION_CACHE_TTL_HOURS", "168"))
+    return ExtractionCache(
+        directory=os.getenv("EXTRACTION_CACHE_DIR", "results/extraction_cache"),
+        max_bytes=int(float(os.getenv("EXTRACTION_CACHE_MAX_MB", "128")) * 2**20),
+        ttl=ttl_hours * 3600 if ttl_hours > 0 else None,
+    )
@@ -0,0 +1,93 @@
+import re
+from collections import defaultdict
+
+from src.ocr.quality import score_text_quality
+
+# Tie-break order between result sources: deterministic rule matches first,
+# then OCR engines. An embedded text layer is exact when present, Mistral is
+# the strongest engine on scans, Marker comes last
+STRATEGY_PRIORITY = ["rules", "PyMuPdfOcrStrategy", "MistralOcrStrategy", "MarkerOcrStrategy"]
+
+
+def _strategy_rank(strategy_name: str) -> int:
+    try:
+        return STRATEGY_PRIORITY.index(strategy_name)
+    except ValueError:
+        return len(STRATEGY_PRIORITY)
+
+
+def rank_texts(ocr_result: dict[str, str]) -> list[tuple[str, str]]:
+    """
+    Orders a page's non-empty OCR texts from best to worst quality score,
+    ties broken by STRATEGY_PRIORITY.
+    """
+    candidates = [
+        (strategy_name, text)
+        for strategy_name, text in ocr_result.items()
+        if text and text.strip()
+    ]
+    return sorted(
+        candidates,
+        key=lambda item: (-score_text_quality(item[1]).score, _strategy_rank(item[0])),
+    )
+
+
+def select_best_text(ocr_result: dict[str, str]) -> tuple[str, str] | None:
+    """
+    Picks the OCR text most likely to yield a good extraction.
+
+    Args:
+        ocr_result: Strategy name to OCR text for a single page.
+
+    Returns:
+        The (strategy name, text) with the highest quality score, ties broken
+        by STRATEGY_PRIORITY, or None if every text is empty.
+    """
+    ranked = rank_texts(ocr_result)
+    return ranked[0] if ranked else None
+
+
+def _normalize_value(value) -> str:
+    text = re.sub(r"\s+", " ", str(value)).strip().lower()
+    # "5,4 %" and "5.4%" are the same reading
+    return re.sub(r"(?<=\d),(?=\d)", ".", text).replace(" %", "%")
+
+
+def reconcile_results(extractions: list[tuple[int, str, dict]]) -> dict:
+    """
+    Merges extraction results from many pages and strategies into one dict.
+
+    For every test, each extraction that reports it casts one vote for its
+    normalized value and the most voted value wins. Ties go to the value seen
+    first in (page, STRATEGY_PRIORITY) order, so the output never depends on
+    call completion order.
+
+    Args:
+        extractions: (page index, strategy name, results) triples.
+
+    Returns:
+        Test name to reconciled value.
+    """
+    ordered = sorted(extractions, key=lambda item: (item[0], _strategy_rank(item[1])))
+    votes: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    first_seen: dict[str, dict[str, tuple[int, object]]] = defaultdict(dict)
+    position = 0
+
+    for _, _, results in ordered:
+        if not results or not isinstance(results, dict):
+            continue
+        for test_name, value in results.items():
+            normalized = _normalize_value(value)
+            votes[test_name][normalized] += 1
+            if normalized not in first_seen[test_name]:
+                first_seen[test_name][normalized] = (position, value)
+            position += 1
+
+    reconciled = {}
+    for test_name in sorted(votes, key=lambda name: min(p for p, _ in first_seen[name].values())):
+        winner = max(
+            votes[test_name],
+            key=lambda value: (votes[test_name][value], -first_seen[test_name][value][0]),
+        )
+        reconciled[test_name] = first_seen[test_name][winner][1]
+    return reconciled
@@ -3,25 +3,160 @@ import os
 import dspy
 from dotenv import load_dotenv
 
-from src.extraction.signatures import ExamsWithoutResult, LabResultSignature
+from src.extraction.cache import ExtractionCache, signature_fingerprint
+from src.extraction.scheduler import LlmScheduler
+from src.extraction.signatures import (
+    BatchLabResultSignature,
+    ConsensusLabResultSignature,
+    ExamsWithoutResult,
+    LabResultSignature,
+)
+from src.utils.cassette import create_cassette_transport
+from src.utils.metrics import llm_extraction_failures_total, llm_extraction_seconds
+from src.utils.resilience import create_resilient_caller
 
 load_dotenv()
 
 
 class LabDataExtractor:
-    def __init__(self, model="openrouter/deepseek/deepseek-r1-0528-qwen3-8b"):
+    def __init__(
+        self,
+        model="openrouter/deepseek/deepseek-r1-0528-qwen3-8b",
+        cache: ExtractionCache | None = None,
+        scheduler: LlmScheduler | None = None,
+    ):
+        self.model = model
+        self.cache = cache
+        self.scheduler = scheduler
+        # Deadline, hedging, retries and circuit breaking for every LLM call
+        self.caller = create_resilient_caller("OPENROUTER", "openrouter")
+        # Records or replays LLM responses when REPLAY_MODE is set
+        self.transport = create_cassette_transport("openrouter")
+        # The scheduler owns retries, so the client must not retry 429s on its own
+        retry_options = {"num_retries": 0} if scheduler is not None else {}
         self.lm = dspy.LM(
             model=model,
             api_base="https://openrouter.ai/api/v1",
             api_key=os.getenv("OPENROUTER_API_KEY"),
+            # The request gives up at the caller's deadline instead of holding a thread
+            timeout=self.caller.timeout,
+            **retry_options,
         )
         dspy.configure(lm=self.lm)
         self.extract_lab_data = dspy.Predict(LabResultSignature)
+        self.extract_lab_data_consensus = dspy.Predict(ConsensusLabResultSignature)
+        self.extract_lab_data_batch = dspy.Predict(BatchLabResultSignature)
         self.check_exams_without_result = dspy.Predict(ExamsWithoutResult)
 
-    def extract(self, document_text: str) -> dict:
-        prediction = self.extract_lab_data(document_text=document_text)
-        return prediction.results
+    def extract(self, document_text: str, use_cache: bool = True) -> dict:
+        """
+        Extracts lab results from the document text.
+        Set `use_cache` to False to bypass the extraction cache and always call the LLM.
+        """
+        use_cache = use_cache and self.cache is not None
+        if use_cache:
+            cached = self.cache.get(document_text, LabResultSignature, self.model)
+            if cached is not None:
+                return cached
+
+        prediction = self._predict(self.extract_lab_data, document_text=document_text)
+        results = prediction.results
+        if use_cache and isinstance(results, dict):
+            self.cache.set(document_text, LabResultSignature, self.model, results)
+        return results
+
+    def extract_variants(self, variants: list[str], use_cache: bool = True) -> dict:
+        """
+        Extracts lab results from several OCR transcriptions of the same page
+        in a single LLM call.
+        """
+        use_cache = use_cache and self.cache is not None
+        cache_text = "\n\n=====\n\n".join(variants)
+        if use_cache:
+            cached = self.cache.get(cache_text, ConsensusLabResultSignature, self.model)
+            if cached is not None:
+                return cached
+
+        prediction = self._predict(self.extract_lab_data_consensus, document_variants=variants)
+        results = prediction.results
+        if use_cache and isinstance(results, dict):
+            self.cache.set(cache_text, ConsensusLabResultSignature, self.model, results)
+        return results
+
+    def extract_batch(self, page_texts: list[str], use_cache: bool = True) -> list[dict]:
+        """
+        Extracts lab results from several page texts in a single LLM call.
+        Pages already in the cache are not sent.
+
+        Returns:
+            One results dict per page, aligned with `page_texts`.
+
+        Raises:
+            ValueError: If the response does not hold one results dict per page.
+        """
+        use_cache = use_cache and self.cache is not None
+        results: list[dict | None] = [None] * len(page_texts)
+        if use_cache:
+            for i, text in enumerate(page_texts):
+                results[i] = self.cache.get(text, BatchLabResultSignature, self.model)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            prediction = self._predict(
+                self.extract_lab_data_batch, page_texts=[page_texts[i] for i in missing]
+            )
+            batch_results = prediction.results
+            if not isinstance(batch_results, list) or len(batch_results) != len(missing):
+                raise ValueError(f"Expected {len(missing)} page results in the batch response")
+            if not all(isinstance(result, dict) for result in batch_results):
+                raise ValueError("Batch response holds a page result that is not a dict")
+            for i, result in zip(missing, batch_results):
+                results[i] = result
+                if use_cache:
+                    self.cache.set(page_texts[i], BatchLabResultSignature, self.model, result)
+        return results
+
+    def _predict(self, predictor: dspy.Predict, **inputs) -> dspy.Prediction:
+        """
+        Calls a predictor through the resilient caller, and through the
+        shared rate-limited queue and the cassette transport when configured.
+        With the queue, the deadline and hedging only start once a call holds
+        a scheduler slot, and a timed-out request is cancelled there.
+        """
+        def live():
+            if self.scheduler is None:
+                return self.caller.call(predictor, **inputs)
+            return self.caller.call_queued(self.scheduler.run, lambda: predictor.acall(**inputs))
+
+        signature_name = predictor.signature.__name__
+        try:
+            with llm_extraction_seconds.time(signature=signature_name):
+                if self.transport is None:
+                    return live()
+                return self.transport.call(
+                    self._recording_request(predictor, inputs),
+                    live,
+                    *self._prediction_codec(predictor),
+                )
+        except Exception:
+            llm_extraction_failures_total.inc(signature=signature_name)
+            raise
+
+    def _recording_request(self, predictor: dspy.Predict, inputs: dict) -> dict:
+        # Editing the prompt or switching models must not replay old answers
+        return {
+            "model": self.model,
+            "signature": signature_fingerprint(predictor.signature),
+            "inputs": inputs,
+        }
+
+    @staticmethod
+    def _prediction_codec(predictor: dspy.Predict) -> tuple:
+        output_names = list(predictor.signature.output_fields)
+        return (
+            lambda prediction: {name: getattr(prediction, name) for name in output_names},
+            lambda outputs: dspy.Prediction(**outputs),
+        )
 
     def check_exams_without_result(self, document_text: str) -> dict:
         prediction = self.check_exams_without_result(document_text=document_text)
@@ -0,0 +1,180 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from src.utils.term_matcher import TermMatch, term_matcher
+
+# Units accepted after a value. A value without one of these is not trusted,
+# which keeps dates, page numbers and phone numbers out of the results
+UNITS = [
+    "mil/mm³", "mil/mm3", "/mm³", "/mm3", "mg/dL", "g/dL", "µg/dL", "ug/dL",
+    "mcg/dL", "ng/dL", "ng/mL", "pg/mL", "µUI/mL", "uUI/mL", "mUI/mL", "UI/mL",
+    "mUI/L", "UI/L", "U/L", "nmol/L", "pmol/L", "µmol/L", "umol/L", "mmol/L",
+    "mEq/L", "g/L", "mg/L", "fL", "pg", "%",
+]
+QUALIFIERS = r"inferior\s+a|superior\s+a|menor\s+que|maior\s+que|até|<=|>=|<|>|≤|≥"
+NUMBER = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?"
+UNIT = "|".join(re.escape(unit) for unit in sorted(UNITS, key=len, reverse=True))
+
+# The first value after a term: anything but digits in between, spanning at
+# most two line breaks, then an optional qualifier, the number and its unit
+VALUE_PATTERN = re.compile(
+    rf"[^\d\n]{{0,60}}?(?:\n[^\d\n]{{0,60}}?){{0,2}}?"
+    rf"(?P<qualifier>{QUALIFIERS})?\s*(?P<number>{NUMBER})\s*(?P<unit>{UNIT})(?![\w/])",
+    re.IGNORECASE,
+)
+REFERENCE_PATTERN = re.compile(
+    rf"(?:valores?\s+de\s+refer[êe]ncia|intervalo\s+de\s+refer[êe]ncia|refer[êe]ncia|\bVR\b)"
+    rf"\s*[:.]?\s*(?P<reference>(?:(?:{QUALIFIERS})\s*)?(?:{NUMBER})"
+    rf"(?:\s*(?:a|-|–|até)\s*(?:{NUMBER}))?(?:\s*(?:{UNIT}))?)",
+    re.IGNORECASE,
+)
+BARE_RANGE_PATTERN = re.compile(
+    rf"^[^\d\n]{{0,20}}(?P<reference>(?:{NUMBER})\s*(?:a|-|–|até)\s*(?:{NUMBER})(?:\s*(?:{UNIT}))?)",
+    re.IGNORECASE,
+)
+# Lines that carry the reference range of the value printed above them
+REFERENCE_LINE_PATTERN = re.compile(
+    r"\s*(?:valores?\s+de\s+refer|intervalo\s+de\s+refer|refer[êe]ncia|VR\b|(?:\d+(?:[.,]\d+)?)\s*(?:a|-|–|até)\s*\d)",
+    re.IGNORECASE,
+)
+
+# A later line with a label of its own ("Hemoglobina ......: 14,2 g/dL") owns
+# the value printed on it, unless the label is a field of the term above
+LABELED_LINE_PATTERN = re.compile(
+    r"^\s*(?!(?:resultados?|valor(?:es)?|material|m[ée]todo)\b)[^\W\d_][^\n:]*?(?::|\.{3,})",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+@dataclass
+class RuleMatch:
+    canonical_name: str
+    value: str
+    number: float
+    unit: str
+    reference: str | None = None
+
+
+@dataclass
+class RuleExtraction:
+    matches: dict[str, RuleMatch] = field(default_factory=dict)
+    found_terms: list[str] = field(default_factory=list)
+    unresolved_terms: list[str] = field(default_factory=list)
+
+    @property
+    def results(self) -> dict[str, str]:
+        """Canonical test name to value, in the same shape as LLM results."""
+        return {name: match.value for name, match in self.matches.items()}
+
+
+class RuleBasedExtractor:
+    """
+    Local, deterministic lab result extractor built on `medical_terms`.
+
+    For every canonical analyte found in the text it parses the first value
+    with a known unit that follows the term, plus the reference range printed
+    after it. Brazilian number formats ("5,4", "1.234,5") and qualifiers such
+    as "Inferior a" are understood. Terms are located with the shared
+    `term_matcher` in one pass over the text.
+    """
+
+    def extract(self, document_text: str) -> RuleExtraction:
+        """
+        Extracts every analyte that can be resolved without an LLM.
+
+        Args:
+            document_text: The OCR text of one or more pages.
+
+        Returns:
+            A RuleExtraction with the parsed matches, every canonical term
+            found in the text, and the found terms whose value could not be
+            parsed.
+        """
+        extraction = RuleExtraction()
+        term_matches = term_matcher.find_all(document_text)
+        occurrences: dict[str, list[TermMatch]] = defaultdict(list)
+        for term_match in term_matches:
+            occurrences[term_match.canonical].append(term_match)
+
+        for canonical_name, term_occurrences in occurrences.items():
+            extraction.found_terms.append(canonical_name)
+            for term_match in term_occurrences:
+                match = self._parse_value(
+                    canonical_name, document_text, term_match.end, term_matches
+                )
+                if match is not None:
+                    extraction.matches[canonical_name] = match
+                    break
+            else:
+                extraction.unresolved_terms.append(canonical_name)
+        return extraction
+
+    def _parse_value(
+        self,
+        canonical_name: str,
+        text: str,
+        position: int,
+        term_matches: list[TermMatch],
+    ) -> RuleMatch | None:
+        value_match = VALUE_PATTERN.match(text, position)
+        if value_match is None:
+            return None
+        # A value printed after another analyte's name belongs to that analyte
+        value_start = value_match.start("qualifier")
+        if value_start < 0:
+            value_start = value_match.start("number")
+        if any(
+            position <= term_match.start < value_start
+            and term_match.canonical != canonical_name
+            for term_match in term_matches
+        ):
+            return None
+        # Neither does a value on a later line that has a label of its own
+        gap_lines = text[position:value_start].split("\n", 1)
+        if len(gap_lines) > 1 and LABELED_LINE_PATTERN.search(gap_lines[1]):
+            return None
+
+        qualifier = value_match.group("qualifier")
+        number = value_match.group("number")
+        unit = value_match.group("unit")
+        value = f"{number} {unit}" if unit != "%" else f"{number} %"
+        if qualifier:
+            value = " ".join(qualifier.split()) + " " + value
+
+        return RuleMatch(
+            canonical_name=canonical_name,
+            value=value,
+            number=parse_brazilian_number(number),
+            unit=unit,
+            reference=self._find_reference(text, value_match.end()),
+        )
+
+    @staticmethod
+    def _find_reference(text: str, position: int) -> str | None:
+        """
+        Looks for a reference range on the rest of the value's line, then on
+        the next line if that line is a reference line.
+        """
+        rest = text[position:].split("\n", 2)
+        windows = [rest[0]]
+        if len(rest) > 1 and REFERENCE_LINE_PATTERN.match(rest[1]):
+            windows.append(rest[1])
+
+        for window in windows:
+            reference_match = REFERENCE_PATTERN.search(window) or BARE_RANGE_PATTERN.match(window)
+            if reference_match is not None:
+                return re.sub(r"\s+", " ", reference_match.group("reference")).strip()
+        return None
+
+
+def parse_brazilian_number(number: str) -> float:
+    """
+    Parses numbers written with a decimal comma and optional thousands dots,
+    for example "5,4" or "1.234,5". Plain "5.4" is read as a decimal point.
+    """
+    if "," in number:
+        return float(number.replace(".", "").replace(",", "."))
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+", number):
+        return float(number.replace(".", ""))
+    return float(number)
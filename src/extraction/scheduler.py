@@ -0,0 +1,234 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+
+# How many recent queue waits are kept for the percentile statistics
+WAIT_SAMPLES = 1000
+# Backoff ceiling for 429s that come without a Retry-After header
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucket:
+    """
+    Request-rate limiter for a single event loop.
+
+    Tokens refill at `rate` per second up to `capacity`. Waiters are served
+    in FIFO order. After a rate-limit response, `pause` stops every waiter
+    and empties the bucket, so traffic resumes at the steady rate instead
+    of in a burst that would trigger the next 429.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock: asyncio.Lock | None = None
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        # Refilling starts when the pause ends, not during it
+        self.updated = self.paused_until
+
+    async def acquire(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+def is_rate_limited(exc: Exception) -> bool:
+    """Whether an LLM client exception is an HTTP 429 rate-limit response."""
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Reads the Retry-After header (seconds or HTTP date) of an exception's response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class LlmScheduler:
+    """
+    Shared queue in front of every LLM call of the process.
+
+    Calls from any thread or event loop run on one background event loop,
+    at most `max_concurrency` at a time and no faster than
+    `requests_per_minute`. A 429 pauses the whole queue for its Retry-After
+    (or an exponential backoff) and the call is retried up to `max_retries`
+    times. The time each call spends queued is recorded for `stats`.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 60,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        burst: float | None = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(
+            rate=requests_per_minute / 60.0,
+            capacity=burst if burst is not None else self.max_concurrency,
+        )
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.submitted = 0
+        self.started = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    def submit(self, call: Callable[[], Awaitable[Any]]) -> Future:
+        """
+        Queues an LLM call from any thread.
+
+        Args:
+            call: Creates the coroutine doing the request, for example
+                `lambda: predictor.acall(**inputs)`. It is called again on retry.
+
+        Returns:
+            A concurrent Future with the call's result.
+        """
+        with self._stats_lock:
+            self.submitted += 1
+        return asyncio.run_coroutine_threadsafe(
+            self._execute(call, time.monotonic()), self._ensure_loop()
+        )
+
+    def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Queues an LLM call and blocks until its result is available."""
+        return self.submit(call).result()
+
+    async def _execute(self, call: Callable[[], Awaitable[Any]], submitted_at: float) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        attempt = 0
+        while True:
+            async with self._slots:
+                await self.bucket.acquire()
+                with self._stats_lock:
+                    if attempt == 0:
+                        self.started += 1
+                        self._waits.append(time.monotonic() - submitted_at)
+                    self.in_flight += 1
+                try:
+                    result = await call()
+                except Exception as exc:
+                    if not is_rate_limited(exc) or attempt >= self.max_retries:
+                        with self._stats_lock:
+                            self.failed += 1
+                        raise
+                    delay = retry_after_seconds(exc)
+                    if delay is None:
+                        delay = min(2.0**attempt, MAX_BACKOFF_SECONDS)
+                    with self._stats_lock:
+                        self.rate_limited += 1
+                    print(f"LLM rate limited, pausing the queue for {delay:.1f}s")
+                    self.bucket.pause(delay)
+                else:
+                    with self._stats_lock:
+                        self.completed += 1
+                    return result
+                finally:
+                    with self._stats_lock:
+                        self.in_flight -= 1
+            attempt += 1
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="llm-scheduler", daemon=True
+                ).start()
+            return self._loop
+
+    def stats(self) -> dict:
+        """Queue depth, call counters and queue-wait percentiles in seconds."""
+        with self._stats_lock:
+            waits = sorted(self._waits)
+            stats = {
+                "requests_per_minute": self.requests_per_minute,
+                "max_concurrency": self.max_concurrency,
+                "queued": self.submitted - self.started,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rate_limited": self.rate_limited,
+            }
+
+        def percentile(fraction: float) -> float | None:
+            if not waits:
+                return None
+            return round(waits[min(int(fraction * len(waits)), len(waits) - 1)], 4)
+
+        stats["queue_wait"] = {
+            "samples": len(waits),
+            "mean": round(sum(waits) / len(waits), 4) if waits else None,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "max": round(waits[-1], 4) if waits else None,
+        }
+        return stats
+
+    def shutdown(self) -> None:
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+                self._slots = None
+                self.bucket._lock = None
+
+
+def create_llm_scheduler() -> LlmScheduler | None:
+    """
+    Creates the LLM scheduler configured from the environment, or None when
+    `LLM_SCHEDULER_ENABLED` is false. `LLM_REQUESTS_PER_MINUTE`,
+    `LLM_MAX_CONCURRENCY` and `LLM_MAX_RETRIES` set its limits.
+    """
+    if os.getenv("LLM_SCHEDULER_ENABLED", "false").lower() != "true":
+        return None
+    return LlmScheduler(
+        requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+    )
@@ -11,6 +11,31 @@ class LabResultSignature(dspy.Signature):
     )
 
 
+class ConsensusLabResultSignature(dspy.Signature):
+    """Extract result information from several OCR transcriptions of the same lab result page.
+    When the transcriptions disagree on a value, use the reading supported by most of them."""
+
+    document_variants: list[str] = dspy.InputField(
+        desc="Different OCR transcriptions of the same lab result page."
+    )
+    results: dict[str, str] = dspy.OutputField(
+        desc="The results of the lab test. The key is the name of the test and the value is the result. "
+        "The result can be something like 'Inferior a 7 nmol/L' or 'Desprezível' or just regular number with units."
+    )
+
+
+class BatchLabResultSignature(dspy.Signature):
+    """Extract result information from several consecutive pages of a lab result document.
+    Return one results dict per page, in the same order as the pages."""
+
+    page_texts: list[str] = dspy.InputField(desc="The texts of consecutive lab result pages, in page order.")
+    results: list[dict[str, str]] = dspy.OutputField(
+        desc="One entry per input page, in page order. Each entry maps the name of a test found on that page "
+        "to its result, like 'Inferior a 7 nmol/L' or 'Desprezível' or just regular number with units. "
+        "Use an empty dict for a page without results."
+    )
+
+
 class ExamsWithoutResult(dspy.Signature):
     """Check if there is a medical exam without a result."""
 
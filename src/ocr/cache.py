@@ -0,0 +1,69 @@
+import hashlib
+import os
+
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import cache_requests_total
+
+
+class OcrCache:
+    """
+    Content-addressed cache of OCR output.
+
+    Entries are keyed by the hash of the page bytes plus the strategy name
+    and version, so bumping a strategy's `version` invalidates its entries.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.store = DiskCache(directory, max_bytes)
+
+    @staticmethod
+    def make_key(page_bytes: bytes, strategy_name: str, strategy_version: str) -> str:
+        digest = hashlib.sha256(page_bytes)
+        digest.update(f"\0{strategy_name}\0{strategy_version}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(
+        self, page_bytes: bytes, strategy_name: str, strategy_version: str
+    ) -> str | None:
+        entry = self.store.get(self.make_key(page_bytes, strategy_name, strategy_version))
+        cache_requests_total.inc(cache="ocr", result="hit" if entry else "miss")
+        return entry["text"] if entry else None
+
+    def set(
+        self, page_bytes: bytes, strategy_name: str, strategy_version: str, text: str
+    ) -> None:
+        self.store.set(
+            self.make_key(page_bytes, strategy_name, strategy_version),
+            {"strategy": strategy_name, "version": strategy_version, "text": text},
+        )
+
+    def invalidate(self, strategy_name: str | None = None) -> int:
+        """
+        Removes cached OCR results.
+
+        Args:
+            strategy_name: Only remove entries produced by this strategy.
+                If None, the whole cache is cleared.
+
+        Returns:
+            The number of entries removed.
+        """
+        if strategy_name is None:
+            return self.store.clear()
+        return self.store.delete_where(lambda entry: entry.get("strategy") == strategy_name)
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+def create_ocr_cache() -> OcrCache | None:
+    """
+    Creates the OCR cache configured from the environment, or None when
+    `OCR_CACHE_ENABLED` is false.
+    """
+    if os.getenv("OCR_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    return OcrCache(
+        directory=os.getenv("OCR_CACHE_DIR", "results/ocr_cache"),
+        max_bytes=int(float(os.getenv("OCR_CACHE_MAX_MB", "512")) * 2**20),
+    )
@@ -0,0 +1,93 @@
+import resource
+import threading
+import time
+
+
+def _current_rss_bytes() -> int:
+    """Returns the resident set size of the current process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _parameter_bytes(artifact) -> int:
+    """Best-effort size of the torch weights held by a Marker artifact."""
+    module = getattr(artifact, "model", artifact)
+    parameters = getattr(module, "parameters", None)
+    if not callable(parameters):
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return 0
+
+
+class MarkerModelRegistry:
+    """
+    Process-wide holder for the Marker layout/recognition model stack.
+
+    The models are loaded lazily on first use and then shared by every
+    `MarkerOcrStrategy` instance, page, request and thread of the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._artifacts: dict | None = None
+        self.load_time: float | None = None
+        self.rss_delta_bytes: int | None = None
+        self.parameter_bytes: int | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._artifacts is not None
+
+    def get_artifacts(self) -> dict:
+        """
+        Returns the Marker artifact dict, loading it on the first call.
+        Concurrent first callers block until the single load completes.
+        """
+        if self._artifacts is not None:
+            return self._artifacts
+
+        with self._lock:
+            if self._artifacts is None:
+                from marker.models import create_model_dict
+
+                rss_before = _current_rss_bytes()
+                start = time.perf_counter()
+                artifacts = create_model_dict()
+                self.load_time = time.perf_counter() - start
+                self.rss_delta_bytes = max(_current_rss_bytes() - rss_before, 0)
+                self.parameter_bytes = sum(
+                    _parameter_bytes(artifact) for artifact in artifacts.values()
+                )
+                self._artifacts = artifacts
+                print(
+                    f"Loaded Marker models in {self.load_time:.2f}s "
+                    f"(~{self.rss_delta_bytes / 2**20:.0f} MiB RSS)"
+                )
+        return self._artifacts
+
+    def stats(self) -> dict:
+        """Returns load time and memory footprint of the loaded models."""
+        return {
+            "loaded": self.is_loaded,
+            "load_time": self.load_time,
+            "rss_delta_bytes": self.rss_delta_bytes,
+            "parameter_bytes": self.parameter_bytes,
+        }
+
+    def unload(self) -> None:
+        """Drops the cached models so the next call reloads them."""
+        with self._lock:
+            self._artifacts = None
+            self.load_time = None
+            self.rss_delta_bytes = None
+            self.parameter_bytes = None
+
+
+marker_models = MarkerModelRegistry()
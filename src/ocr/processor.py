@@ -1,18 +1,66 @@
 import concurrent.futures
+import os
+import threading
 
+from src.ocr.cache import OcrCache, create_ocr_cache
+from src.ocr.quality import score_text_quality
 from src.ocr.strategies import (
-    MarkerOcrStrategy,
+    STRATEGIES_BY_NAME,
     MistralOcrStrategy,
     OcrStrategy,
-    PyMuPdfOcrStrategy,
 )
+from src.utils.file_utils import get_file_type, merge_pdf_pages
+from src.utils.metrics import ocr_strategy_failures_total, ocr_strategy_seconds
 
 
 class OcrProcessor:
-    def __init__(self):
+    """
+    Runs the registered OCR strategies on a document.
+
+    In "parallel" mode every strategy runs concurrently. In "cascade" mode the
+    strategies run in order, cheapest first, and the first result whose
+    quality score reaches `cascade_threshold` is returned; if none does, the
+    best scoring result is returned.
+
+    With `document_mode`, Mistral is taken out of the per-page strategies and
+    `complete_document` sends every page that needs it in one request.
+
+    `strategy_names` limits the strategies to a subset of
+    STRATEGIES_BY_NAME ("pymupdf", "marker", "mistral"). Engines are only
+    imported and created when a page first needs them, so leaving Marker
+    out means torch is never loaded.
+    """
+
+    MODES = ("parallel", "cascade")
+
+    def __init__(
+        self,
+        cache: OcrCache | None = None,
+        mode: str = "parallel",
+        cascade_threshold: float = 0.6,
+        document_mode: bool = False,
+        strategy_names: list[str] | None = None,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown OCR mode: {mode}")
+        strategy_names = list(strategy_names or STRATEGIES_BY_NAME)
+        unknown = [name for name in strategy_names if name not in STRATEGIES_BY_NAME]
+        if unknown:
+            raise ValueError(f"Unknown OCR strategies: {', '.join(unknown)}")
+        enabled = [
+            strategy_class
+            for name, strategy_class in STRATEGIES_BY_NAME.items()
+            if name in strategy_names
+        ]
+        self.cache = cache
+        self.mode = mode
+        self.cascade_threshold = cascade_threshold
+        self.document_mode = document_mode and MistralOcrStrategy in enabled
+        self._instances: dict[type[OcrStrategy], OcrStrategy] = {}
+        self._instances_lock = threading.Lock()
         self.strategies: dict[str, list[type[OcrStrategy]]] = {
-            "pdf": [PyMuPdfOcrStrategy, MarkerOcrStrategy, MistralOcrStrategy],
-            "image": [MistralOcrStrategy],
+            "pdf": enabled,
+            "image": [MistralOcrStrategy] if MistralOcrStrategy in enabled else [],
         }
 
     def process(self, file_path: str) -> dict[str, str]:
@@ -21,32 +69,195 @@ class OcrProcessor:
             print(f"Unsupported file type for: {file_path}")
             return {}
 
-        results = {}
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}")
+            return {}
+
+        return self.process_bytes(data, file_type)
+
+    def process_bytes(self, data: bytes, file_type: str = "pdf") -> dict[str, str]:
+        """
+        Runs the strategies registered for `file_type` on an in-memory document.
+
+        Args:
+            data: The document bytes, typically a single PDF page.
+            file_type: Either "pdf" or "image".
+
+        Returns:
+            A dict mapping strategy class names to their extracted text.
+        """
         strategies_to_run = self.strategies.get(file_type, [])
+        if self.document_mode and file_type == "pdf":
+            strategies_to_run = [
+                strategy_class
+                for strategy_class in strategies_to_run
+                if strategy_class is not MistralOcrStrategy
+            ]
+        if self.mode == "cascade":
+            return self._process_cascade(data, file_type, strategies_to_run)
 
+        results = {}
         with concurrent.futures.ThreadPoolExecutor() as executor:
             future_to_strategy = {}
             for strategy_class in strategies_to_run:
-                future = executor.submit(strategy_class().execute, file_path)
-                future_to_strategy[future] = strategy_class.__name__
+                future = executor.submit(self._run_strategy, strategy_class, data, file_type)
+                future_to_strategy[future] = strategy_class
 
             for future in concurrent.futures.as_completed(future_to_strategy):
-                strategy_name = future_to_strategy[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results[strategy_name] = result
-                except Exception as exc:
-                    print(f"{strategy_name} generated an exception: {exc}")
+                result = future.result()
+                if result:
+                    results[future_to_strategy[future].__name__] = result
 
         return results
 
+    def _process_cascade(
+        self,
+        data: bytes,
+        file_type: str,
+        strategies: list[type[OcrStrategy]],
+    ) -> dict[str, str]:
+        best_name, best_text, best_score = None, "", -1.0
+        for strategy_class in strategies:
+            text = self._run_strategy(strategy_class, data, file_type)
+            if not text:
+                continue
+            quality = score_text_quality(text)
+            if quality.score > best_score:
+                best_name, best_text = strategy_class.__name__, text
+                best_score = quality.score
+            if quality.score >= self.cascade_threshold:
+                break
+            print(
+                f"{strategy_class.__name__} scored {quality.score:.2f} "
+                f"(< {self.cascade_threshold}), escalating"
+            )
+
+        return {best_name: best_text} if best_name else {}
+
+    def complete_document(
+        self, pages: list[bytes], results: list[dict[str, str]]
+    ) -> list[dict[str, str]]:
+        """
+        Adds Mistral OCR output to per-page results with one request per document.
+
+        In parallel mode every page gets Mistral text. In cascade mode only
+        pages whose best result is still below the threshold are sent, and
+        Mistral's text replaces theirs if it scores higher. Pages already in
+        the cache are never sent.
+
+        Args:
+            pages: Single-page PDF bytes, in document order.
+            results: The per-page output of `process_bytes`, aligned with `pages`.
+
+        Returns:
+            The updated `results` list.
+        """
+        strategy_name = MistralOcrStrategy.__name__
+        version = MistralOcrStrategy.version
+        if self.mode == "cascade":
+            wanted = [i for i, result in enumerate(results) if self.needs_escalation(result)]
+        else:
+            wanted = list(range(len(pages)))
+
+        texts = {}
+        to_send = []
+        for i in wanted:
+            cached = self.cache.get(pages[i], strategy_name, version) if self.cache else None
+            if cached is None:
+                to_send.append(i)
+            else:
+                texts[i] = cached
+
+        if to_send:
+            try:
+                with ocr_strategy_seconds.time(strategy=strategy_name):
+                    document_texts = self._get_strategy(MistralOcrStrategy).execute_document(
+                        merge_pdf_pages([pages[i] for i in to_send])
+                    )
+            except Exception as exc:
+                print(f"{strategy_name} document request generated an exception: {exc}")
+                ocr_strategy_failures_total.inc(strategy=strategy_name)
+                document_texts = {}
+            for position, i in enumerate(to_send):
+                text = document_texts.get(position, "")
+                if text:
+                    texts[i] = text
+                    if self.cache is not None:
+                        self.cache.set(pages[i], strategy_name, version, text)
+
+        for i, text in texts.items():
+            if self.mode == "cascade":
+                current = next(iter(results[i].values()), "")
+                if score_text_quality(text).score > score_text_quality(current).score:
+                    results[i] = {strategy_name: text}
+            else:
+                results[i][strategy_name] = text
+        return results
+
+    def needs_escalation(self, result: dict[str, str]) -> bool:
+        """Whether a page's best OCR text is still below the cascade threshold."""
+        best = max(
+            (score_text_quality(text).score for text in result.values()), default=0.0
+        )
+        return best < self.cascade_threshold
+
+    def _get_strategy(self, strategy_class: type[OcrStrategy]) -> OcrStrategy:
+        """
+        Returns the processor's shared instance of a strategy, so engine
+        clients are created once and reused by every page and thread.
+        """
+        with self._instances_lock:
+            if strategy_class not in self._instances:
+                self._instances[strategy_class] = strategy_class()
+            return self._instances[strategy_class]
+
+    def _run_strategy(
+        self, strategy_class: type[OcrStrategy], data: bytes, file_type: str
+    ) -> str:
+        """
+        Runs one strategy, serving and storing its result through the cache.
+        Exceptions are reported and turned into an empty result.
+        """
+        strategy_name = strategy_class.__name__
+        if self.cache is not None:
+            cached = self.cache.get(data, strategy_name, strategy_class.version)
+            if cached is not None:
+                return cached
+
+        try:
+            with ocr_strategy_seconds.time(strategy=strategy_name):
+                result = self._get_strategy(strategy_class).execute_bytes(data, file_type)
+        except Exception as exc:
+            print(f"{strategy_name} generated an exception: {exc}")
+            ocr_strategy_failures_total.inc(strategy=strategy_name)
+            return ""
+
+        if result and self.cache is not None:
+            self.cache.set(data, strategy_name, strategy_class.version, result)
+        return result
+
     def _get_file_type(self, file_path: str) -> str | None:
-        if file_path.lower().endswith(".pdf"):
-            return "pdf"
-        elif file_path.lower().endswith((".png", ".jpg", ".jpeg")):
-            return "image"
-        return None
+        return get_file_type(file_path)
+
+
+def create_ocr_processor() -> OcrProcessor:
+    """
+    Creates an OCR processor configured from the environment: the OCR cache,
+    `OCR_MODE` (parallel/cascade), `OCR_CASCADE_THRESHOLD`,
+    `MISTRAL_DOCUMENT_MODE` and `OCR_STRATEGIES` (comma-separated, all by
+    default).
+    """
+    strategies = os.getenv("OCR_STRATEGIES", ",".join(STRATEGIES_BY_NAME))
+    return OcrProcessor(
+        cache=create_ocr_cache(),
+        mode=os.getenv("OCR_MODE", "parallel"),
+        cascade_threshold=float(os.getenv("OCR_CASCADE_THRESHOLD", "0.6")),
+        document_mode=os.getenv("MISTRAL_DOCUMENT_MODE", "false").lower() == "true",
+        strategy_names=[name.strip().lower() for name in strategies.split(",") if name.strip()],
+    )
 
 
 if __name__ == "__main__":
@@ -59,4 +270,4 @@ if __name__ == "__main__":
     ocr_results = processor.process(file_to_process)
 
     print(type(ocr_results))
-    print(len(ocr_results))
\ No newline at end of file
+    print(len(ocr_results))
@@ -0,0 +1,59 @@
+import unicodedata
+from dataclasses import dataclass
+
+from src.utils.file_utils import find_medical_terms
+
+# Text with this many non-space characters counts as a fully dense page
+DENSE_PAGE_CHARS = 400
+# This many distinct lab terms count as a fully recognised lab page
+EXPECTED_TERM_HITS = 3
+# Unicode categories that real lab text never contains: control, unassigned,
+# private use and surrogate code points
+GARBAGE_CATEGORIES = {"Cc", "Cn", "Co", "Cs"}
+
+
+@dataclass
+class TextQuality:
+    chars: int
+    term_hits: int
+    garbage_ratio: float
+    score: float
+
+
+def score_text_quality(text: str) -> TextQuality:
+    """
+    Scores how usable an OCR text is for lab result extraction.
+
+    The score is in [0, 1]. Character density and lab-term hits each
+    contribute half, and the total is scaled down by the share of garbage
+    characters such as replacement characters and control codes.
+
+    Args:
+        text: The OCR output of a single page.
+
+    Returns:
+        A TextQuality with the individual signals and the combined score.
+    """
+    visible = [char for char in text if not char.isspace()]
+    if not visible:
+        return TextQuality(chars=0, term_hits=0, garbage_ratio=0.0, score=0.0)
+
+    garbage = sum(
+        1
+        for char in visible
+        if char == "\ufffd" or unicodedata.category(char) in GARBAGE_CATEGORIES
+    )
+    garbage_ratio = garbage / len(visible)
+    term_hits = len(find_medical_terms(text))
+
+    density_score = min(len(visible) / DENSE_PAGE_CHARS, 1.0)
+    term_score = min(term_hits / EXPECTED_TERM_HITS, 1.0)
+    garbage_penalty = 1.0 - min(garbage_ratio * 4, 1.0)
+    score = (0.5 * density_score + 0.5 * term_score) * garbage_penalty
+
+    return TextQuality(
+        chars=len(visible),
+        term_hits=term_hits,
+        garbage_ratio=round(garbage_ratio, 4),
+        score=round(score, 4),
+    )
@@ -0,0 +1,68 @@
+import os
+import re
+from dataclasses import dataclass
+
+from src.extraction.rules import NUMBER, UNIT
+from src.utils.term_matcher import term_matcher
+
+# Signs of a results page that hold for analytes outside `medical_terms`: a
+# value with a lab unit, or a reference range or result label
+LAB_VALUE_PATTERN = re.compile(rf"(?<![\w.,])(?:{NUMBER})\s*(?:{UNIT})(?![\w/])", re.IGNORECASE)
+LAB_LABEL_PATTERN = re.compile(
+    r"valores?\s+de\s+refer[êe]ncia|intervalo\s+de\s+refer[êe]ncia|^\s*resultados?\s*:",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+@dataclass
+class PageRelevance:
+    relevant: bool
+    # "lab_terms", "lab_values", "no_text_layer" or "no_lab_content"
+    reason: str
+    chars: int
+    term_hits: int
+
+
+class PageRelevanceFilter:
+    """
+    Decides from the embedded text layer whether a page holds lab results.
+
+    Reading the text layer costs a fraction of a millisecond, so the filter
+    runs before OCR. A page with at least `min_text_chars` characters is
+    relevant when it has `min_term_hits` known lab terms, or any generic
+    lab content: a value with a lab unit, or a reference range or result
+    label, so analytes missing from the dictionary are not lost. Pages
+    with none of these (cover pages, disclaimers, signatures) are not
+    relevant. A page with little or no text layer is always kept, since
+    it may be a scan only OCR can read.
+    """
+
+    def __init__(self, min_term_hits: int = 1, min_text_chars: int = 50):
+        self.min_term_hits = min_term_hits
+        self.min_text_chars = min_text_chars
+
+    def classify_text(self, text: str) -> PageRelevance:
+        """Classifies a page from its already extracted text layer."""
+        chars = len("".join(text.split()))
+        if chars < self.min_text_chars:
+            return PageRelevance(True, "no_text_layer", chars, 0)
+
+        term_hits = len(term_matcher.find_terms(text))
+        if term_hits >= self.min_term_hits:
+            return PageRelevance(True, "lab_terms", chars, term_hits)
+        if LAB_VALUE_PATTERN.search(text) or LAB_LABEL_PATTERN.search(text):
+            return PageRelevance(True, "lab_values", chars, term_hits)
+        return PageRelevance(False, "no_lab_content", chars, term_hits)
+
+
+def create_page_filter() -> PageRelevanceFilter | None:
+    """
+    Creates the page relevance filter configured from the environment, or
+    None when `PAGE_FILTER_ENABLED` is false.
+    """
+    if os.getenv("PAGE_FILTER_ENABLED", "true").lower() != "true":
+        return None
+    return PageRelevanceFilter(
+        min_term_hits=int(os.getenv("PAGE_FILTER_MIN_TERMS", "1")),
+        min_text_chars=int(os.getenv("PAGE_FILTER_MIN_CHARS", "50")),
+    )
@@ -1,46 +1,100 @@
+import base64
 import os
+import tempfile
 from abc import ABC, abstractmethod
+from types import SimpleNamespace
 
 import fitz
 from dotenv import load_dotenv
-from marker.converters.pdf import PdfConverter
-from marker.models import create_model_dict
-from marker.output import text_from_rendered
-from mistralai import Mistral
 
-from src.utils.file_utils import encode_image_to_base64
+from src.ocr.model_registry import marker_models
+from src.utils.cassette import create_cassette_transport
+from src.utils.file_utils import fitz_lock, get_file_type
+from src.utils.resilience import create_resilient_caller
 
 load_dotenv()
 
 
 class OcrStrategy(ABC):
-    @abstractmethod
+    # Bump when a strategy's output changes so cached results are not reused
+    version: str = "1"
+
     def execute(self, file_path: str) -> str:
         """
         Performs OCR on the given file and returns the extracted text.
         """
+        with open(file_path, "rb") as f:
+            data = f.read()
+        return self.execute_bytes(data, get_file_type(file_path) or "pdf")
+
+    @abstractmethod
+    def execute_bytes(self, data: bytes, file_type: str = "pdf") -> str:
+        """
+        Performs OCR on an in-memory document and returns the extracted text.
+        `file_type` is either "pdf" or "image".
+        """
         pass
 
 
 class MarkerOcrStrategy(OcrStrategy):
     def execute(self, file_path: str) -> str:
-        converter = PdfConverter(artifact_dict=create_model_dict())
+        # Marker pulls in torch; import it only once a page actually needs it
+        from marker.converters.pdf import PdfConverter
+        from marker.output import text_from_rendered
+
+        converter = PdfConverter(artifact_dict=marker_models.get_artifacts())
         rendered = converter(file_path)
         text, _, _ = text_from_rendered(rendered)
         # TODO: Handle multiple pages better
         return text.split("2/26")[0]
 
+    def execute_bytes(self, data: bytes, file_type: str = "pdf") -> str:
+        # Marker only reads from a path, so spill the page to a short-lived file
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            return self.execute(temp_file.name)
+
 
 class MistralOcrStrategy(OcrStrategy):
     def __init__(self):
-        self.client = Mistral(api_key=os.environ["MISTRAL_API_KEY"])
+        from mistralai import Mistral
 
-    def execute(self, file_path: str) -> str:
-        base64_file = encode_image_to_base64(file_path)
-        if not base64_file:
+        # Deadline, hedging, retries and circuit breaking for every OCR request
+        self.caller = create_resilient_caller("MISTRAL", "mistral")
+        # Records or replays OCR responses when REPLAY_MODE is set
+        self.transport = create_cassette_transport("mistral")
+        if self.transport is not None and self.transport.offline:
+            api_key = os.getenv("MISTRAL_API_KEY", "")
+        else:
+            api_key = os.environ["MISTRAL_API_KEY"]
+        # The client gives up at the caller's deadline instead of holding a thread
+        self.client = Mistral(api_key=api_key, timeout_ms=int(self.caller.timeout * 1000))
+
+    def _process(self, **request):
+        """Sends an OCR request, through the cassette transport when configured."""
+        def live():
+            return self.caller.call(self.client.ocr.process, **request)
+
+        if self.transport is None:
+            return live()
+        return self.transport.call(
+            request,
+            live,
+            encode=lambda response: [
+                {"index": page.index, "markdown": page.markdown} for page in response.pages
+            ],
+            decode=lambda pages: SimpleNamespace(
+                pages=[SimpleNamespace(**page) for page in pages]
+            ),
+        )
+
+    def execute_bytes(self, data: bytes, file_type: str = "pdf") -> str:
+        if not data:
             return ""
+        base64_file = base64.b64encode(data).decode("utf-8")
 
-        if file_path.lower().endswith(".pdf"):
+        if file_type == "pdf":
             document = {
                 "type": "document_url",
                 "document_url": f"data:application/pdf;base64,{base64_file}",
@@ -51,22 +105,56 @@ class MistralOcrStrategy(OcrStrategy):
                 "image_url": f"data:image/jpeg;base64,{base64_file}",
             }
 
-        ocr_response = self.client.ocr.process(
-            model="mistral-ocr-latest", document=document, include_image_base64=True
+        ocr_response = self._process(
+            model="mistral-ocr-latest",
+            document=document,
+            include_image_base64=True,
         )
         return ocr_response.pages[0].markdown
 
+    def execute_document(self, data: bytes) -> dict[int, str]:
+        """
+        Sends a whole multi-page PDF in a single OCR request.
+
+        Returns:
+            A dict mapping each returned page index (0-based, in document
+            order) to its markdown text.
+        """
+        if not data:
+            return {}
+        base64_file = base64.b64encode(data).decode("utf-8")
+        document = {
+            "type": "document_url",
+            "document_url": f"data:application/pdf;base64,{base64_file}",
+        }
+        # Page images are never used downstream, so don't pay to download them
+        ocr_response = self._process(
+            model="mistral-ocr-latest",
+            document=document,
+            include_image_base64=False,
+        )
+        return {page.index: page.markdown for page in ocr_response.pages}
+
 
 class PyMuPdfOcrStrategy(OcrStrategy):
-    def execute(self, file_path: str) -> str:
+    def execute_bytes(self, data: bytes, file_type: str = "pdf") -> str:
         try:
-            doc = fitz.open(file_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-                break  # Only first page for now
-            doc.close()
+            with fitz_lock:
+                doc = fitz.open(stream=data, filetype="pdf")
+                text = ""
+                for page in doc:
+                    text += page.get_text()
+                    break  # Only first page for now
+                doc.close()
             return text
         except Exception as e:
             print(f"Error opening or reading PDF file with PyMuPDF: {e}")
             return ""
+
+
+# Names accepted by the OCR_STRATEGIES setting, in cheapest-first order
+STRATEGIES_BY_NAME: dict[str, type[OcrStrategy]] = {
+    "pymupdf": PyMuPdfOcrStrategy,
+    "marker": MarkerOcrStrategy,
+    "mistral": MistralOcrStrategy,
+}
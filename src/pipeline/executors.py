@@ -0,0 +1,172 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Callable, Hashable
+
+DEFAULT_STAGE_WORKERS = {
+    "request": 4,
+    "ocr": 4,
+    "extraction": 4,
+}
+
+
+class FairThreadPoolExecutor(Executor):
+    """
+    Thread pool that serves its submitters round-robin.
+
+    Each task is queued under an `owner` key (for example one pipeline run)
+    and idle workers take the next task of the next owner in turn, so a
+    document with many pages cannot hold the pool while others wait behind
+    it. Tasks of the same owner still run in submission order.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "fair"):
+        self.max_workers = max(max_workers, 1)
+        self._queues: OrderedDict[Hashable, deque] = OrderedDict()
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(
+                target=self._work, name=f"{thread_name_prefix}_{i}", daemon=True
+            )
+            for i in range(self.max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, /, *args: Any, owner: Hashable = None, **kwargs: Any) -> Future:
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queues.setdefault(owner, deque()).append((future, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def pending(self) -> int:
+        with self._condition:
+            return sum(len(tasks) for tasks in self._queues.values())
+
+    def _next_task(self) -> tuple | None:
+        with self._condition:
+            while not self._queues and not self._shutdown:
+                self._condition.wait()
+            if not self._queues:
+                return None
+            owner, tasks = self._queues.popitem(last=False)
+            task = tasks.popleft()
+            if tasks:
+                # Back of the rotation, behind every other waiting owner
+                self._queues[owner] = tasks
+            return task
+
+    def _work(self) -> None:
+        while (task := self._next_task()) is not None:
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for tasks in self._queues.values():
+                    for future, *_ in tasks:
+                        future.cancel()
+                self._queues.clear()
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class StageExecutors:
+    """
+    One bounded executor per pipeline stage.
+
+    The worker count of each executor is that stage's concurrency limit, shared
+    by every request and job of the process. Thread stages serve the owners
+    passed to `submit` round-robin (see FairThreadPoolExecutor). Stages
+    listed in `process_stages` run on a process pool instead, in plain
+    submission order; functions submitted to them must be picklable
+    module-level callables.
+    """
+
+    def __init__(
+        self,
+        stage_workers: dict[str, int] | None = None,
+        process_stages: set[str] | None = None,
+    ):
+        self.stage_workers = {**DEFAULT_STAGE_WORKERS, **(stage_workers or {})}
+        self.process_stages = set(process_stages or ())
+        self._executors: dict[str, Executor] = {}
+        for stage, workers in self.stage_workers.items():
+            if stage in self.process_stages:
+                # Forked workers could inherit fitz_lock held by another
+                # thread and deadlock on their first PyMuPDF call
+                self._executors[stage] = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executors[stage] = FairThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix=f"{stage}-stage"
+                )
+
+    def uses_processes(self, stage: str) -> bool:
+        return stage in self.process_stages
+
+    def submit(self, stage: str, fn: Callable, *args: Any, owner: Hashable = None) -> Future:
+        """
+        Schedules `fn(*args)` on the executor of `stage`.
+
+        Args:
+            stage: The pipeline stage whose workers run the call.
+            fn: The function to call.
+            *args: Positional arguments for `fn`.
+            owner: Who the task is for, typically one pipeline run. Owners
+                share a thread stage's workers round-robin; None is an owner
+                like any other.
+        """
+        try:
+            executor = self._executors[stage]
+        except KeyError:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        if stage in self.process_stages:
+            return executor.submit(fn, *args)
+        return executor.submit(fn, *args, owner=owner)
+
+    def run(self, stage: str, fn: Callable, *args: Any, owner: Hashable = None) -> Any:
+        """Runs `fn(*args)` on the executor of `stage` and waits for the result."""
+        return self.submit(stage, fn, *args, owner=owner).result()
+
+    async def arun(self, stage: str, fn: Callable, *args: Any, owner: Hashable = None) -> Any:
+        """Awaitable variant of `run` that never blocks the event loop."""
+        return await asyncio.wrap_future(self.submit(stage, fn, *args, owner=owner))
+
+    def shutdown(self, wait: bool = False) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def create_stage_executors() -> StageExecutors:
+    """
+    Creates stage executors configured from the environment.
+
+    `STAGE_WORKERS_<STAGE>` sets the worker count of a stage (for example
+    `STAGE_WORKERS_OCR=4`) and `OCR_EXECUTOR=process` moves OCR to a process pool.
+    """
+    stage_workers = {
+        stage: int(os.getenv(f"STAGE_WORKERS_{stage.upper()}", default))
+        for stage, default in DEFAULT_STAGE_WORKERS.items()
+    }
+    process_stages = {"ocr"} if os.getenv("OCR_EXECUTOR", "thread") == "process" else set()
+    return StageExecutors(stage_workers, process_stages)
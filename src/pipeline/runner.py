@@ -0,0 +1,753 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from src.extraction.batching import estimate_tokens, extract_in_batches, pack_batches
+from src.extraction.consensus import rank_texts, reconcile_results, select_best_text
+from src.extraction.rules import RuleBasedExtractor
+from src.ocr.processor import OcrProcessor, create_ocr_processor
+from src.ocr.relevance import PageRelevance, PageRelevanceFilter, create_page_filter
+from src.pipeline.executors import StageExecutors
+from src.utils.file_utils import extract_pdf_page, fitz_lock, open_pdf
+from src.utils.metrics import pages_total, stage_seconds
+
+if TYPE_CHECKING:
+    # Importing the extractor loads DSPy, which the pipeline itself never needs
+    from src.extraction.extractor import LabDataExtractor
+
+# Called as progress(stage, done, total) whenever a stage advances
+ProgressCallback = Callable[[str, int, int], None]
+# Called as on_event(event) with page-level events, e.g. {"event": "ocr", "page": 1, ...}
+EventCallback = Callable[[dict], None]
+
+
+@dataclass
+class PipelineResult:
+    results: dict = field(default_factory=dict)
+    # Pages sent to OCR and extraction, not counting skipped_pages
+    pages_processed: int = 0
+    processing_time: float = 0.0
+    # {"page": 1-based page number, "reason": why it was not processed}
+    skipped_pages: list[dict] = field(default_factory=list)
+
+
+class LabPipeline:
+    """
+    Runs split -> OCR -> extraction for a single PDF file.
+
+    The OCR processor and the extractor are shared between runs, so one
+    instance can serve many documents. When `executors` is given, each stage
+    runs on its bounded stage executor instead of the calling thread, and
+    the stages overlap: a page's OCR output is extracted as soon as it is
+    ready while other pages are still being OCR'd. At most
+    `max_pending_pages` pages are between OCR start and extraction end at
+    any time, and pages are only split off the document when OCR has room
+    for them, which bounds memory through backpressure on the split. Each
+    run is its own owner on the stage executors, so concurrent runs get
+    their pages processed in turns.
+
+    `extraction_mode` decides what is sent to the LLM for each page:
+    "per_strategy" extracts every OCR text separately, "best" only the
+    highest quality text, and "consensus" all texts in one multi-input call.
+    Results are always merged with `reconcile_results`.
+
+    With a `batch_token_budget`, single-text extractions of consecutive
+    pages are packed into one LLM call of at most that many estimated
+    tokens of page text, split again automatically if the response can't
+    be mapped back to its pages.
+
+    With a `page_filter`, pages whose text layer shows no lab content are
+    dropped right after the split and never reach OCR or extraction.
+
+    `rule_mode` enables the local rule-based extractor: "fallback" parses
+    every page with it first and only calls the LLM for pages where some
+    analyte could not be resolved, "only" never calls the LLM, and "off"
+    disables it. Whatever the mode, a failed LLM call falls back to the
+    rule-based results for its texts.
+    """
+
+    STAGES = ("split", "ocr", "extraction")
+    EXTRACTION_MODES = ("per_strategy", "best", "consensus")
+    RULE_MODES = ("off", "fallback", "only")
+
+    def __init__(
+        self,
+        ocr_processor: OcrProcessor,
+        extractor: "LabDataExtractor",
+        executors: StageExecutors | None = None,
+        max_pending_pages: int = 8,
+        extraction_mode: str = "per_strategy",
+        rule_mode: str = "off",
+        page_filter: PageRelevanceFilter | None = None,
+        batch_token_budget: int = 0,
+    ):
+        if extraction_mode not in self.EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode: {extraction_mode}")
+        if rule_mode not in self.RULE_MODES:
+            raise ValueError(f"Unknown rule mode: {rule_mode}")
+        self.extraction_mode = extraction_mode
+        self.rule_mode = rule_mode
+        self.rule_extractor = RuleBasedExtractor() if rule_mode != "off" else None
+        self.fallback_extractor = self.rule_extractor or RuleBasedExtractor()
+        self.ocr_processor = ocr_processor
+        self.extractor = extractor
+        self.executors = executors
+        self.max_pending_pages = max(max_pending_pages, 1)
+        self.page_filter = page_filter
+        self.batch_token_budget = max(batch_token_budget, 0)
+
+    def run(
+        self,
+        source: str | bytes,
+        progress: ProgressCallback | None = None,
+        on_event: EventCallback | None = None,
+    ) -> PipelineResult:
+        """
+        Processes a PDF and returns the merged lab results.
+
+        Args:
+            source: Path to the input PDF file or its raw bytes.
+            progress: Optional callback notified as each stage advances.
+            on_event: Optional callback receiving page events as they happen:
+                "page_skipped", "ocr" (strategies and seconds) and
+                "extraction" (source, results and seconds). It may be
+                called from worker threads.
+
+        Returns:
+            A PipelineResult with the extracted data and the pages skipped
+            by the page filter. Pages are split in memory as OCR asks for
+            them, so nothing is written next to the input file.
+        """
+        start_time = time.time()
+        notify = progress or (lambda stage, done, total: None)
+
+        doc = open_pdf(source)
+        try:
+            page_source = _PageSource(self, doc, notify, on_event)
+            recorder = _RunRecorder(page_source.kept, on_event)
+            if self.executors is None:
+                self._run_sequential(page_source, notify, recorder)
+            else:
+                self._run_streaming(page_source, notify, recorder)
+        finally:
+            doc.close()
+        stage_seconds.observe(page_source.seconds, stage="split")
+        pages_total.inc(len(page_source.kept), outcome="processed")
+        pages_total.inc(len(page_source.skipped_pages), outcome="skipped")
+
+        processing_time = time.time() - start_time
+        stage_seconds.observe(processing_time, stage="total")
+        return PipelineResult(
+            results=reconcile_results(recorder.extractions),
+            pages_processed=len(page_source.kept),
+            processing_time=processing_time,
+            skipped_pages=page_source.skipped_pages,
+        )
+
+    def _classify_page(self, doc, page_index: int) -> PageRelevance | None:
+        """Classifies a page of the open document, or None without a filter."""
+        if self.page_filter is None:
+            return None
+        with fitz_lock:
+            text = doc[page_index].get_text()
+        return self.page_filter.classify_text(text)
+
+    def _run_sequential(
+        self, page_source: "_PageSource", notify: ProgressCallback, recorder: "_RunRecorder"
+    ) -> None:
+        """OCR and extract page by page on the calling thread."""
+        # Page bytes are only kept when document-level OCR needs them again
+        pages = []
+        ocr_results = []
+        notify("ocr", 0, page_source.expected())
+        for i, page_bytes in enumerate(page_source):
+            if self.ocr_processor.document_mode:
+                pages.append(page_bytes)
+            ocr_start = time.time()
+            ocr_results.append(self.ocr_processor.process_bytes(page_bytes))
+            recorder.ocr_done(i, ocr_results[-1], time.time() - ocr_start)
+            notify("ocr", i + 1, page_source.expected())
+        if self.ocr_processor.document_mode:
+            before = [dict(result) for result in ocr_results]
+            ocr_start = time.time()
+            ocr_results = self.ocr_processor.complete_document(pages, ocr_results)
+            for page_index, ocr_result in enumerate(ocr_results):
+                if ocr_result != before[page_index]:
+                    recorder.ocr_done(page_index, ocr_result, time.time() - ocr_start)
+
+        items = []
+        for page_index, ocr_result in enumerate(ocr_results):
+            if self._apply_rules(page_index, ocr_result, recorder):
+                continue
+            items.extend(
+                (page_index, label, payload)
+                for label, payload in self._extraction_items(ocr_result)
+            )
+        notify("extraction", 0, len(items))
+        done = 0
+        for label, units in self._plan_calls(items):
+            self._extract_units(label, units, recorder)
+            done += len(units)
+            notify("extraction", done, len(items))
+
+    def _run_streaming(
+        self, page_source: "_PageSource", notify: ProgressCallback, recorder: "_RunRecorder"
+    ) -> None:
+        """
+        Feeds finished OCR pages through a queue straight into extraction.
+
+        A producer thread splits pages off the open document one at a time
+        and submits their OCR, blocking while `max_pending_pages` pages are
+        still in flight, so the split overlaps with OCR and only in-flight
+        pages are held in memory. This thread consumes OCR results in
+        completion order and submits their extraction at once.
+        """
+        ocr_done = queue.Queue()
+        slots = threading.Semaphore(self.max_pending_pages)
+        ocr_page = self._ocr_page_function()
+        submitted_at: dict[int, float] = {}
+        # Page bytes are only kept when document-level OCR needs them again
+        pages: list[bytes] = []
+        producer_errors: list[Exception] = []
+        # Set when the consumer stops early, so the producer stops splitting
+        cancelled = threading.Event()
+
+        def produce():
+            produced = 0
+            try:
+                for page_index, page_bytes in enumerate(page_source):
+                    slots.acquire()
+                    if cancelled.is_set():
+                        break
+                    if self.ocr_processor.document_mode:
+                        pages.append(page_bytes)
+                    submitted_at[page_index] = time.time()
+                    future = self.executors.submit("ocr", ocr_page, page_bytes, owner=recorder)
+                    future.add_done_callback(
+                        lambda f, page_index=page_index: ocr_done.put((page_index, f))
+                    )
+                    produced += 1
+            except Exception as e:
+                producer_errors.append(e)
+            finally:
+                # Tells the consumer how many OCR results to wait for
+                ocr_done.put((None, produced))
+
+        producer = threading.Thread(target=produce, name="ocr-producer", daemon=True)
+        producer.start()
+
+        ocr_results: list[dict[str, str]] = []
+        deferred: set[int] = set()
+        resolved: set[int] = set()
+        batcher = _BatchBuffer(self, recorder) if self.batch_token_budget else None
+        pending: list[Future] = []
+        extraction_progress = _Counter(
+            lambda done, total: notify("extraction", done, total)
+        )
+        notify("ocr", 0, page_source.expected())
+        produced = None
+        done = 0
+        try:
+            while produced is None or done < produced:
+                page_index, future = ocr_done.get()
+                if page_index is None:
+                    produced = future
+                    continue
+                done += 1
+                try:
+                    ocr_result = future.result()
+                except Exception as e:
+                    print(f"OCR failed for page {page_index + 1}: {e}")
+                    ocr_result = {}
+                if page_index >= len(ocr_results):
+                    ocr_results.extend({} for _ in range(page_index + 1 - len(ocr_results)))
+                ocr_results[page_index] = dict(ocr_result)
+                recorder.ocr_done(page_index, ocr_result, time.time() - submitted_at[page_index])
+                notify("ocr", done, produced if produced is not None else page_source.expected())
+
+                if self._waits_for_document(ocr_result):
+                    deferred.add(page_index)
+                    ocr_result = {}
+                elif self._apply_rules(page_index, ocr_result, recorder):
+                    resolved.add(page_index)
+                    ocr_result = {}
+                pending.extend(
+                    self._submit_extractions(
+                        page_index,
+                        ocr_result,
+                        extraction_progress,
+                        recorder,
+                        slots.release,
+                        batcher,
+                    )
+                )
+                # Waiting pages hold their slots, so never let them fill the queue
+                if batcher is not None and batcher.waiting_pages() >= self.max_pending_pages:
+                    batcher.flush()
+        finally:
+            # Wakes a producer blocked on a slot and lets it finish before
+            # run() closes the document under its page iterator
+            cancelled.set()
+            slots.release()
+            producer.join()
+        if producer_errors:
+            raise producer_errors[0]
+        if batcher is not None:
+            batcher.flush()
+
+        if self.ocr_processor.document_mode:
+            before = [dict(result) for result in ocr_results]
+            ocr_start = time.time()
+            completed = self._complete_document(pages, ocr_results, owner=recorder)
+            for page_index, ocr_result in enumerate(completed):
+                if ocr_result != before[page_index]:
+                    recorder.ocr_done(page_index, ocr_result, time.time() - ocr_start)
+                if page_index in resolved:
+                    continue
+                new_texts = {
+                    strategy_name: text
+                    for strategy_name, text in ocr_result.items()
+                    if page_index in deferred
+                    or before[page_index].get(strategy_name) != text
+                }
+                if self._apply_rules(page_index, new_texts, recorder):
+                    continue
+                pending.extend(
+                    self._submit_extractions(
+                        page_index, new_texts, extraction_progress, recorder, batcher=batcher
+                    )
+                )
+            if batcher is not None:
+                batcher.flush()
+
+        # Results are recorded by the tasks themselves; just wait for them
+        if batcher is not None:
+            pending.extend(batcher.submitted)
+        for future in pending:
+            future.result()
+
+    def _submit_extractions(
+        self,
+        page_index: int,
+        ocr_result: dict[str, str],
+        progress: "_Counter",
+        recorder: "_RunRecorder",
+        on_page_done: Callable[[], None] | None = None,
+        batcher: "_BatchBuffer | None" = None,
+    ) -> list[Future]:
+        """
+        Submits the extraction calls of a page. `on_page_done` runs once every
+        extraction of the page has finished. Single texts are handed to
+        `batcher` when given, and only other calls are returned.
+        """
+        items = self._extraction_items(ocr_result)
+        if not items:
+            if on_page_done is not None:
+                on_page_done()
+            return []
+
+        def page_progress(done: int, total: int):
+            if done == total and on_page_done is not None:
+                on_page_done()
+
+        remaining = _Counter(page_progress)
+        remaining.add(len(items))
+        progress.add(len(items))
+
+        def extraction_done(_: Future | None = None):
+            progress.finish()
+            remaining.finish()
+
+        submitted = []
+        for label, payload in items:
+            if batcher is not None and isinstance(payload, str):
+                batcher.add(page_index, label, payload, extraction_done)
+                continue
+            future = self.executors.submit(
+                "extraction",
+                self._extract_units,
+                label,
+                [(page_index, payload)],
+                recorder,
+                owner=recorder,
+            )
+            future.add_done_callback(extraction_done)
+            submitted.append(future)
+        return submitted
+
+    def _apply_rules(
+        self,
+        page_index: int,
+        ocr_result: dict[str, str],
+        recorder: "_RunRecorder",
+    ) -> bool:
+        """
+        Runs the rule-based extractor on a page's texts, best quality first,
+        and records what it resolved as a "rules" extraction when the LLM
+        is skipped. Pages that still go to the LLM are extracted in full
+        there, so their rule results would only add canonical names next to
+        the LLM's own test names.
+
+        Returns:
+            Whether the LLM can be skipped for these texts: always in "only"
+            mode, otherwise when analytes were found and all were resolved.
+        """
+        if self.rule_extractor is None:
+            return False
+
+        start = time.time()
+        results = {}
+        found_terms = set()
+        for _, text in rank_texts(ocr_result):
+            extraction = self.rule_extractor.extract(text)
+            found_terms.update(extraction.found_terms)
+            for test_name, value in extraction.results.items():
+                results.setdefault(test_name, value)
+
+        skip_llm = self.rule_mode == "only" or (
+            bool(found_terms) and found_terms <= results.keys()
+        )
+        if skip_llm and results:
+            recorder.add(page_index, "rules", results, time.time() - start)
+        return skip_llm
+
+    def _waits_for_document(self, ocr_result: dict[str, str]) -> bool:
+        """
+        Whether a page's extraction must wait for document-level OCR: cascade
+        pages that will be escalated, and pages whose texts are selected or
+        combined before extraction.
+        """
+        if not self.ocr_processor.document_mode:
+            return False
+        if self.extraction_mode != "per_strategy":
+            return True
+        return (
+            self.ocr_processor.mode == "cascade"
+            and self.ocr_processor.needs_escalation(ocr_result)
+        )
+
+    def _extraction_items(
+        self, ocr_result: dict[str, str]
+    ) -> list[tuple[str, str | list[str]]]:
+        """
+        Turns a page's OCR output into (label, payload) extraction calls
+        according to the extraction mode. A list payload is a set of variants
+        for one consensus call.
+        """
+        texts = [
+            (strategy_name, text)
+            for strategy_name, text in ocr_result.items()
+            if text and text.strip()
+        ]
+        if not texts:
+            return []
+        if self.extraction_mode == "best":
+            return [select_best_text(dict(texts))]
+        if self.extraction_mode == "consensus" and len(texts) > 1:
+            texts.sort(key=lambda item: item[0])
+            return [("consensus", [text for _, text in texts])]
+        return texts
+
+    def _plan_calls(
+        self, items: list[tuple[int, str, str | list[str]]]
+    ) -> list[tuple[str, list[tuple[int, str | list[str]]]]]:
+        """
+        Groups (page index, label, payload) items into extraction calls. With
+        a batch budget, single texts of the same label are packed in page
+        order; everything else is one call per item.
+        """
+        if not self.batch_token_budget:
+            return [(label, [(page_index, payload)]) for page_index, label, payload in items]
+
+        calls = []
+        texts_by_label: dict[str, list[tuple[int, str]]] = defaultdict(list)
+        for page_index, label, payload in items:
+            if isinstance(payload, str):
+                texts_by_label[label].append((page_index, payload))
+            else:
+                calls.append((label, [(page_index, payload)]))
+        for label, units in texts_by_label.items():
+            units.sort(key=lambda unit: unit[0])
+            for batch in pack_batches([text for _, text in units], self.batch_token_budget):
+                calls.append((label, [units[i] for i in batch]))
+        return calls
+
+    def _extract_units(
+        self,
+        label: str,
+        units: list[tuple[int, str | list[str]]],
+        recorder: "_RunRecorder",
+    ) -> None:
+        """
+        Runs one extraction call over (page index, payload) units, batched
+        when it covers several pages, and records each page's results.
+        """
+        start = time.time()
+        payloads = [payload for _, payload in units]
+        if len(payloads) == 1:
+            results = [self._extract(label, payloads[0])]
+        else:
+            try:
+                results = extract_in_batches(
+                    self.extractor.extract_batch,
+                    lambda text: self._extract(label, text),
+                    payloads,
+                )
+            except Exception as e:
+                print(f"Batch extraction failed for {label}: {e}, falling back to rules")
+                results = [self._rule_fallback(payload) for payload in payloads]
+        seconds = time.time() - start
+        for (page_index, _), result in zip(units, results):
+            recorder.add(page_index, label, result, seconds)
+
+    def _extract(self, label: str, payload: str | list[str]) -> dict:
+        try:
+            if isinstance(payload, list):
+                return self.extractor.extract_variants(payload)
+            return self.extractor.extract(payload)
+        except Exception as e:
+            # Provider down or breaker open: keep whatever local rules can read
+            print(f"Extraction failed for {label}: {e}, falling back to rules")
+            return self._rule_fallback(payload)
+
+    def _rule_fallback(self, payload: str | list[str]) -> dict:
+        texts = payload if isinstance(payload, list) else [payload]
+        results = {}
+        for text in texts:
+            for test_name, value in self.fallback_extractor.extract(text).results.items():
+                results.setdefault(test_name, value)
+        return results
+
+    def _ocr_in_processes(self) -> bool:
+        return self.executors is not None and self.executors.uses_processes("ocr")
+
+    def _ocr_page_function(self) -> Callable[[bytes], dict[str, str]]:
+        # Process pools can't receive the processor (it holds locks), so they
+        # use the module-level worker entry point instead
+        if self._ocr_in_processes():
+            return process_page_in_worker
+        return self.ocr_processor.process_bytes
+
+    def _complete_document(
+        self, pages: list[bytes], results: list[dict[str, str]], owner: object = None
+    ) -> list[dict[str, str]]:
+        if self._ocr_in_processes():
+            return self.executors.run("ocr", complete_document_in_worker, pages, results)
+        return self.executors.run(
+            "ocr", self.ocr_processor.complete_document, pages, results, owner=owner
+        )
+
+
+class _PageSource:
+    """
+    Splits the pages of an open document one at a time, as they are asked
+    for, skipping pages the pipeline's filter finds irrelevant.
+
+    Iterating yields each kept page as a single-page PDF. `kept` maps every
+    yielded page's position to its document page index and `seconds` adds
+    up the time spent splitting and filtering. The document must stay open
+    until iteration ends.
+    """
+
+    def __init__(
+        self,
+        pipeline: LabPipeline,
+        doc,
+        notify: ProgressCallback,
+        on_event: EventCallback | None = None,
+    ):
+        self.pipeline = pipeline
+        self.doc = doc
+        self.page_count = doc.page_count
+        self.notify = notify
+        self.on_event = on_event
+        self.kept: list[int] = []
+        self.skipped_pages: list[dict] = []
+        self.seconds = 0.0
+
+    def expected(self) -> int:
+        """Pages that may still be yielded, counting the ones already yielded."""
+        return self.page_count - len(self.skipped_pages)
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.notify("split", 0, self.page_count)
+        for i in range(self.page_count):
+            start = time.time()
+            # Classify from the text layer first, so skipped pages are never split
+            relevance = self.pipeline._classify_page(self.doc, i)
+            keep = relevance is None or relevance.relevant
+            page_bytes = extract_pdf_page(self.doc, i) if keep else None
+            self.seconds += time.time() - start
+            self.notify("split", i + 1, self.page_count)
+            if keep:
+                self.kept.append(i)
+                yield page_bytes
+                continue
+            self.skipped_pages.append({"page": i + 1, "reason": relevance.reason})
+            if self.on_event is not None:
+                self.on_event({"event": "page_skipped", **self.skipped_pages[-1]})
+
+
+class _BatchBuffer:
+    """
+    Collects page texts for batched extraction in the streaming pipeline.
+
+    Texts wait per label until they fill the pipeline's token budget and
+    then go out as batches of consecutive pages; `flush` sends whatever is
+    left. Only the consuming thread touches the buffer.
+    """
+
+    def __init__(self, pipeline: LabPipeline, recorder: "_RunRecorder"):
+        self.pipeline = pipeline
+        self.recorder = recorder
+        self.waiting: dict[str, list[tuple[int, str, Callable[[], None]]]] = defaultdict(list)
+        self.submitted: list[Future] = []
+
+    def waiting_pages(self) -> int:
+        return len({unit[0] for units in self.waiting.values() for unit in units})
+
+    def add(
+        self, page_index: int, label: str, text: str, on_done: Callable[[], None]
+    ) -> None:
+        units = self.waiting[label]
+        units.append((page_index, text, on_done))
+        if sum(estimate_tokens(unit[1]) for unit in units) >= self.pipeline.batch_token_budget:
+            self._submit(label, keep_last=True)
+
+    def flush(self) -> None:
+        for label in list(self.waiting):
+            self._submit(label, keep_last=False)
+
+    def _submit(self, label: str, keep_last: bool) -> None:
+        units = sorted(self.waiting.pop(label, []), key=lambda unit: unit[0])
+        batches = pack_batches([unit[1] for unit in units], self.pipeline.batch_token_budget)
+        if keep_last and batches:
+            # The last batch may still have room for pages not OCR'd yet
+            self.waiting[label] = [units[i] for i in batches.pop()]
+
+        for batch in batches:
+            batch_units = [units[i] for i in batch]
+            future = self.pipeline.executors.submit(
+                "extraction",
+                self.pipeline._extract_units,
+                label,
+                [(unit[0], unit[1]) for unit in batch_units],
+                self.recorder,
+                owner=self.recorder,
+            )
+
+            def batch_done(_: Future, batch_units=batch_units):
+                for unit in batch_units:
+                    unit[2]()
+
+            future.add_done_callback(batch_done)
+            self.submitted.append(future)
+
+
+class _RunRecorder:
+    """
+    Collects one run's extraction results from any thread and reports page
+    events. Pages are numbered as in the original document, so `page_numbers`
+    maps each processed page's position to its document page index.
+    """
+
+    def __init__(self, page_numbers: list[int], on_event: EventCallback | None = None):
+        self.page_numbers = page_numbers
+        self.on_event = on_event
+        self.extractions: list[tuple[int, str, dict]] = []
+        self._lock = threading.Lock()
+
+    def ocr_done(self, page_index: int, ocr_result: dict[str, str], seconds: float) -> None:
+        self._emit(page_index, "ocr", strategies=sorted(ocr_result), seconds=round(seconds, 3))
+
+    def add(
+        self, page_index: int, label: str, results: dict, seconds: float | None = None
+    ) -> None:
+        with self._lock:
+            self.extractions.append((self.page_numbers[page_index], label, results))
+        self._emit(
+            page_index,
+            "extraction",
+            source=label,
+            results=results,
+            seconds=round(seconds, 3) if seconds is not None else None,
+        )
+
+    def _emit(self, page_index: int, event: str, **fields) -> None:
+        if self.on_event is None:
+            return
+        try:
+            self.on_event({"event": event, "page": self.page_numbers[page_index] + 1, **fields})
+        except Exception as e:
+            print(f"Page event callback failed: {e}")
+
+
+class _Counter:
+    """Thread-safe done/total counter that reports every change."""
+
+    def __init__(self, on_change: Callable[[int, int], None]):
+        self.done = 0
+        self.total = 0
+        self._on_change = on_change
+        self._lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        with self._lock:
+            self.total += count
+            self._on_change(self.done, self.total)
+
+    def finish(self) -> None:
+        with self._lock:
+            self.done += 1
+            self._on_change(self.done, self.total)
+
+
+def create_lab_pipeline(
+    ocr_processor: OcrProcessor,
+    extractor: "LabDataExtractor",
+    executors: StageExecutors | None = None,
+) -> LabPipeline:
+    """
+    Creates a lab pipeline configured from the environment: the
+    OCR-to-extraction queue size `PIPELINE_MAX_PENDING_PAGES`,
+    `EXTRACTION_MODE` (per_strategy/best/consensus), `RULE_EXTRACTION`
+    (off/fallback/only), the page relevance filter and the extraction
+    batch budget `EXTRACTION_BATCH_TOKENS` (0 disables batching).
+    """
+    return LabPipeline(
+        ocr_processor,
+        extractor,
+        executors,
+        max_pending_pages=int(os.getenv("PIPELINE_MAX_PENDING_PAGES", "8")),
+        extraction_mode=os.getenv("EXTRACTION_MODE", "per_strategy"),
+        rule_mode=os.getenv("RULE_EXTRACTION", "off"),
+        page_filter=create_page_filter(),
+        batch_token_budget=int(os.getenv("EXTRACTION_BATCH_TOKENS", "0")),
+    )
+
+
+_worker_ocr_processor: OcrProcessor | None = None
+
+
+def _get_worker_ocr_processor() -> OcrProcessor:
+    global _worker_ocr_processor
+    if _worker_ocr_processor is None:
+        _worker_ocr_processor = create_ocr_processor()
+    return _worker_ocr_processor
+
+
+def process_page_in_worker(page_bytes: bytes) -> dict[str, str]:
+    """OCR entry point for process-pool workers, one OcrProcessor per process."""
+    return _get_worker_ocr_processor().process_bytes(page_bytes)
+
+
+def complete_document_in_worker(
+    pages: list[bytes], results: list[dict[str, str]]
+) -> list[dict[str, str]]:
+    """Document-level OCR entry point for process-pool workers."""
+    return _get_worker_ocr_processor().complete_document(pages, results)
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Callable
+
+from src.utils.disk_cache import DiskCache
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recording matches a request."""
+
+
+class CassetteTransport:
+    """
+    Records provider responses to a local cassette store and replays them.
+
+    Requests are keyed by the hash of the provider name and the request
+    payload, so identical requests share a recording. Modes:
+
+    - "record": always call the provider and store the response.
+    - "replay": only serve recordings; a missing one raises CassetteMissError.
+    - "auto": serve a recording when there is one, otherwise record.
+
+    A replayed response is returned after `latency` seconds, or after the
+    duration measured when it was recorded when `latency` is None, so
+    offline runs keep a realistic provider delay without its variance.
+    """
+
+    MODES = ("record", "replay", "auto")
+
+    def __init__(self, provider: str, store: DiskCache, mode: str = "auto", latency: float | None = 0.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.provider = provider
+        self.store = store
+        self.mode = mode
+        self.latency = latency
+
+    @property
+    def offline(self) -> bool:
+        """Whether the provider is never called, so no credentials are needed."""
+        return self.mode == "replay"
+
+    def make_key(self, request: dict) -> str:
+        payload = json.dumps(
+            {"provider": self.provider, "request": request},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def call(
+        self,
+        request: dict,
+        live: Callable[[], Any],
+        encode: Callable[[Any], Any],
+        decode: Callable[[Any], Any],
+    ) -> Any:
+        """
+        Serves a request from the cassette store or from the provider.
+
+        Args:
+            request: JSON-serializable description of the request; its hash
+                is the recording key.
+            live: Performs the real request.
+            encode: Turns the provider response into JSON-serializable data.
+            decode: Rebuilds a response object from the encoded data.
+
+        Returns:
+            The provider or replayed response.
+        """
+        key = self.make_key(request)
+        entry = self._lookup(key)
+        if entry is not None:
+            time.sleep(self._replay_delay(entry))
+            return decode(entry["response"])
+
+        start = time.monotonic()
+        response = live()
+        self._record(key, encode(response), time.monotonic() - start)
+        return response
+
+    def _lookup(self, key: str) -> dict | None:
+        if self.mode == "record":
+            return None
+        entry = self.store.get(key)
+        if entry is None and self.mode == "replay":
+            raise CassetteMissError(f"No {self.provider} recording for request {key[:12]}")
+        return entry
+
+    def _record(self, key: str, response: Any, seconds: float) -> None:
+        self.store.set(key, {"provider": self.provider, "seconds": seconds, "response": response})
+
+    def _replay_delay(self, entry: dict) -> float:
+        if self.latency is None:
+            return entry.get("seconds", 0.0)
+        return self.latency
+
+
+def create_cassette_transport(provider: str) -> CassetteTransport | None:
+    """
+    Creates the record/replay transport for a provider, or None when
+    `REPLAY_MODE` is off (the default). Recordings live under
+    `CASSETTE_DIR/<provider>`; `REPLAY_LATENCY` is the replay delay in
+    seconds, or "recorded" to reuse each recording's own duration.
+    """
+    mode = os.getenv("REPLAY_MODE", "off").lower()
+    if mode == "off":
+        return None
+    latency = os.getenv("REPLAY_LATENCY", "recorded")
+    store = DiskCache(
+        os.path.join(os.getenv("CASSETTE_DIR", "results/cassettes"), provider),
+        # Recordings are fixtures, never evicted
+        max_bytes=sys.maxsize,
+    )
+    return CassetteTransport(
+        provider,
+        store,
+        mode=mode,
+        latency=None if latency == "recorded" else float(latency),
+    )
@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+class DiskCache:
+    """
+    Size-bounded key/value cache stored as JSON files in a directory.
+
+    Entries are evicted least-recently-used first once the total size of the
+    directory exceeds `max_bytes`. Recency is tracked through file
+    modification times, so it survives restarts and is shared by every
+    process that points at the same directory. Each process only sees its
+    own writes, so it re-reads the directory size before evicting and after
+    every tenth of the budget it writes; processes sharing a directory keep
+    it within the budget plus a tenth per process. When `ttl` is set,
+    entries older than `ttl` seconds are treated as misses and removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = self._disk_bytes()
+        self._written_since_scan = 0
+
+    def _path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _entry_paths(self) -> list[Path]:
+        return list(self.directory.glob("*/*.json"))
+
+    def _disk_bytes(self) -> int:
+        total = 0
+        for path in self._entry_paths():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def get(self, key: str) -> dict | None:
+        """
+        Returns the entry stored under `key`, or None on a miss.
+        A hit refreshes the entry's position in the LRU order.
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry is not None and self._is_expired(entry):
+                self._remove(path)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def set(self, key: str, entry: dict) -> None:
+        """Stores `entry` under `key` and evicts old entries if over budget."""
+        path = self._path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {**entry, "created_at": time.time()}
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+
+        # Write atomically so concurrent readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            previous_size = path.stat().st_size if path.exists() else 0
+            os.replace(temp_path, path)
+            self._total_bytes += len(data) - previous_size
+            self._written_since_scan += len(data)
+            if self._total_bytes > self.max_bytes or self._written_since_scan >= self.max_bytes * 0.1:
+                # Other processes may have written to the directory too
+                self._total_bytes = self._disk_bytes()
+                self._written_since_scan = 0
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> bool:
+        """Removes the entry stored under `key`. Returns whether it existed."""
+        path = self._path_for(key)
+        with self._lock:
+            return self._remove(path)
+
+    def delete_where(self, predicate: Callable[[dict], bool]) -> int:
+        """Removes every entry for which `predicate(entry)` is true."""
+        removed = 0
+        with self._lock:
+            for path in self._entry_paths():
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if predicate(entry) and self._remove(path):
+                    removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """Removes every entry. Returns the number of entries removed."""
+        with self._lock:
+            return sum(1 for path in self._entry_paths() if self._remove(path))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": str(self.directory),
+                "entries": len(self._entry_paths()),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def _is_expired(self, entry: dict) -> bool:
+        if self.ttl is None:
+            return False
+        return time.time() - entry.get("created_at", 0) > self.ttl
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return False
+        self._total_bytes -= size
+        return True
+
+    def _evict(self) -> None:
+        """Drops least recently used entries until under 90% of the budget."""
+        target = self.max_bytes * 0.9
+        entries = []
+        for path in self._entry_paths():
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        for _, path in sorted(entries):
+            if self._total_bytes <= target:
+                break
+            if self._remove(path):
+                self.evictions += 1
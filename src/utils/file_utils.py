@@ -1,10 +1,26 @@
 import base64
 import os
+import threading
 from pathlib import Path
+from typing import Iterator
 
 import fitz  # pymupdf
 
-from src.utils.medical_terms import medical_terms
+from src.utils.term_matcher import term_matcher
+
+# PyMuPDF is not thread-safe; every in-process fitz call should hold this lock
+fitz_lock = threading.RLock()
+
+
+def get_file_type(file_path: str) -> str | None:
+    """
+    Returns "pdf" or "image" based on the file extension, or None if unsupported.
+    """
+    if file_path.lower().endswith(".pdf"):
+        return "pdf"
+    elif file_path.lower().endswith((".png", ".jpg", ".jpeg")):
+        return "image"
+    return None
 
 
 def get_pdf_page_count(pdf_path: str) -> int:
@@ -16,9 +32,10 @@ def get_pdf_page_count(pdf_path: str) -> int:
         The number of pages in the PDF file.
     """
     try:
-        doc = fitz.open(pdf_path)
-        page_count = doc.page_count
-        doc.close()
+        with fitz_lock:
+            doc = fitz.open(pdf_path)
+            page_count = doc.page_count
+            doc.close()
         return page_count
     except Exception as e:
         print(f"Error opening or reading PDF file: {e}")
@@ -74,29 +91,32 @@ def split_pdf_into_pages(pdf_path: str, output_dir: str | None = None) -> list[s
     
     try:
         # Open the source PDF
-        doc = fitz.open(pdf_path)
+        doc = open_pdf(pdf_path)
         
         # Get the base filename without extension
         base_name = Path(pdf_path).stem
         
         # Split each page into a separate PDF
         for page_num in range(doc.page_count):
-            # Create a new PDF document for this page
-            new_doc = fitz.open()
-            new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-            
             # Create output filename with page number (1-indexed)
             output_filename = f"{base_name}_page_{page_num + 1:03d}.pdf"
             output_filepath = output_path / output_filename
             
-            # Save the single-page PDF
-            new_doc.save(str(output_filepath))
-            new_doc.close()
+            # PyMuPDF is not thread-safe, so every call holds fitz_lock
+            with fitz_lock:
+                # Create a new PDF document for this page
+                new_doc = fitz.open()
+                new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+                # Save the single-page PDF. Skipping the random file ID keeps the
+                # bytes identical across runs, so they can be used as a cache key
+                new_doc.save(str(output_filepath), no_new_id=True)
+                new_doc.close()
             
             created_files.append(str(output_filepath))
             print(f"Created: {output_filepath}")
         
-        doc.close()
+        with fitz_lock:
+            doc.close()
         print(f"Successfully split {pdf_path} into {len(created_files)} pages")
         
     except Exception as e:
@@ -111,6 +131,71 @@ def split_pdf_into_pages(pdf_path: str, output_dir: str | None = None) -> list[s
     return created_files
 
 
+def open_pdf(source: str | bytes) -> fitz.Document:
+    """
+    Opens a PDF from a path or from an in-memory byte buffer.
+    Args:
+        source: Path to the PDF file or the raw PDF bytes.
+    Returns:
+        The opened document. The caller is responsible for closing it.
+    """
+    with fitz_lock:
+        if isinstance(source, (bytes, bytearray)):
+            return fitz.open(stream=source, filetype="pdf")
+        return fitz.open(source)
+
+
+def iter_pdf_pages(doc: fitz.Document) -> Iterator[bytes]:
+    """
+    Lazily yields each page of an open PDF as a standalone single-page PDF
+    held in memory, without writing anything to disk.
+    Args:
+        doc: A document returned by `open_pdf`.
+    Yields:
+        The bytes of a one-page PDF, in page order.
+    """
+    for page_num in range(doc.page_count):
+        yield extract_pdf_page(doc, page_num)
+
+
+def extract_pdf_page(doc: fitz.Document, page_num: int) -> bytes:
+    """
+    Copies one page of an open PDF into a standalone single-page PDF held
+    in memory.
+    Args:
+        doc: A document returned by `open_pdf`.
+        page_num: 0-based index of the page.
+    Returns:
+        The bytes of the one-page PDF.
+    """
+    with fitz_lock:
+        new_doc = fitz.open()
+        new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
+        # No random file ID, so identical pages give identical bytes
+        page_bytes = new_doc.tobytes(no_new_id=True)
+        new_doc.close()
+    return page_bytes
+
+
+def merge_pdf_pages(pages: list[bytes]) -> bytes:
+    """
+    Combines single-page PDFs held in memory into one multi-page PDF.
+    Args:
+        pages: PDF byte buffers, in the desired page order.
+    Returns:
+        The bytes of the merged PDF.
+    """
+    with fitz_lock:
+        merged = fitz.open()
+        for page_bytes in pages:
+            page_doc = fitz.open(stream=page_bytes, filetype="pdf")
+            merged.insert_pdf(page_doc)
+            page_doc.close()
+        data = merged.tobytes(no_new_id=True)
+        merged.close()
+    return data
+
+
 def split_pdf_and_get_first_page(pdf_path: str, output_dir: str | None = None) -> str:
     """
     Split a PDF and return the path to the first page only.
@@ -144,15 +229,6 @@ def find_medical_terms(document_text: str) -> list[str]:
         document_text: The text content of a medical document.
 
     Returns:
-        A list of unique medical terms (canonical names) found in the text.
+        A sorted list of unique medical terms (canonical names) found in the text.
     """
-    found_terms = set()
-    lower_document_text = document_text.lower()
-
-    for canonical_name, synonyms in medical_terms.items():
-        for synonym in synonyms:
-            if synonym.lower() in lower_document_text:
-                found_terms.add(synonym)
-                break  # Move to the next canonical term once a synonym is found
-
-    return sorted(list(found_terms))
+    return term_matcher.find_terms(document_text)
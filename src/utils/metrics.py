@@ -0,0 +1,239 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Seconds; covers cached pages (milliseconds) up to Marker on CPU and slow LLM calls
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    A named metric with a fixed set of label names, one series per label
+    combination. Series are created on first use and are thread-safe.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._series: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            # A metric without labels has a single series, exported from the start
+            self._series[()] = self._initial_state()
+
+    def _initial_state(self) -> object:
+        return 0
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+        for values, state in series:
+            lines.extend(self._render_series(values, state))
+        return lines
+
+    def _render_series(self, values: tuple[str, ...], state: object) -> list[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_number(state)}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing count, such as pages processed."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that goes up and down, such as jobs currently running."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        """Counts the enclosed block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, for latencies."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, description, labels)
+
+    def _initial_state(self) -> object:
+        return [0] * len(self.buckets), 0.0
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.get(key) or self._initial_state()
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._series[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the wall-clock duration of the enclosed block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_series(self, values: tuple[str, ...], state: object) -> list[str]:
+        counts, total = state
+        names = self.label_names + ("le",)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = _format_labels(names, values + (_format_number(bound),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics exported by the process, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.register(
+    Histogram(
+        "lab_stage_duration_seconds",
+        "Duration of pipeline stages: upload, split and total per document.",
+        labels=("stage",),
+    )
+)
+ocr_strategy_seconds = registry.register(
+    Histogram(
+        "lab_ocr_strategy_duration_seconds",
+        "Duration of OCR engine calls per strategy, cache hits excluded.",
+        labels=("strategy",),
+    )
+)
+llm_extraction_seconds = registry.register(
+    Histogram(
+        "lab_llm_extraction_duration_seconds",
+        "Duration of LLM extraction calls per signature, including queueing and retries.",
+        labels=("signature",),
+    )
+)
+pages_total = registry.register(
+    Counter(
+        "lab_pages_total",
+        "Document pages seen, by whether they were processed or skipped by the page filter.",
+        labels=("outcome",),
+    )
+)
+ocr_strategy_failures_total = registry.register(
+    Counter(
+        "lab_ocr_strategy_failures_total",
+        "OCR engine calls that raised, per strategy.",
+        labels=("strategy",),
+    )
+)
+llm_extraction_failures_total = registry.register(
+    Counter(
+        "lab_llm_extraction_failures_total",
+        "LLM extraction calls that failed after retries, per signature.",
+        labels=("signature",),
+    )
+)
+cache_requests_total = registry.register(
+    Counter(
+        "lab_cache_requests_total",
+        "Cache lookups by cache (ocr, extraction) and result (hit, miss).",
+        labels=("cache", "result"),
+    )
+)
+documents_in_flight = registry.register(
+    Gauge(
+        "lab_documents_in_flight",
+        "Documents currently being processed by requests, batches and jobs.",
+    )
+)
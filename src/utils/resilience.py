@@ -0,0 +1,323 @@
+import asyncio
+import concurrent.futures
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+
+# Transport errors of the HTTP clients (httpx, litellm), matched by name so
+# this module does not import them
+TRANSPORT_ERROR_NAMES = {"TransportError", "APIConnectionError"}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+def is_transport_failure(exc: Exception) -> bool:
+    """
+    Whether a call failed because the provider could not be reached or
+    answered with a server error (timeouts, connection errors, 408 and 5xx).
+    Other errors, such as a 429 or a response that fails to parse, mean the
+    provider is up and would fail the same way on a retry.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int) and (status == 408 or status >= 500):
+        return True
+    return any(cls.__name__ in TRANSPORT_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after `failure_threshold` consecutive failures.
+
+    While open, calls fail fast with CircuitOpenError so callers can route
+    around the provider. After `reset_timeout` seconds one trial call is let
+    through (half-open); its success closes the breaker, its failure opens
+    it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_ignored(self) -> None:
+        """Ends a call whose outcome says nothing about the provider's health."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class ResilientCaller:
+    """
+    Wraps calls to a remote provider with a deadline, hedging, retries and
+    a circuit breaker.
+
+    Each attempt must finish within `timeout` seconds, including any wait
+    for a free worker thread, so `call` returns within `(max_retries + 1) *
+    timeout` seconds plus the backoff delays. Once at least
+    `hedge_min_samples` latencies are known, an attempt still running after
+    the `hedge_percentile` latency gets a duplicate request and the first
+    response wins. Transport failures (see `is_transport_failure`) are
+    retried up to `max_retries` times with exponential backoff and jitter
+    and count towards the circuit breaker; any other error is raised at
+    once. Only idempotent calls should be wrapped, since hedging and
+    timeouts may leave a request running.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 120.0,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        breaker: CircuitBreaker | None = None,
+        max_workers: int = 16,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker(name)
+        self._latencies: deque[float] = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-call"
+        )
+        self.hedges = 0
+        self.timeouts = 0
+        self.retries = 0
+
+    def call(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Calls `fn(*args, **kwargs)` with the caller's protections.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            The first error that is not a transport failure, or the last
+            attempt's exception once retries are exhausted.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} circuit breaker is open")
+            try:
+                result = self._attempt(fn, args, kwargs)
+            except Exception as exc:
+                if not is_transport_failure(exc):
+                    self.breaker.record_ignored()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt, exc))
+            else:
+                self.breaker.record_success()
+                return result
+
+    def call_queued(
+        self,
+        run: Callable[[Callable[[], Awaitable[Any]]], Any],
+        make_call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Like `call`, for coroutine requests that wait in a queue first, such
+        as `LlmScheduler.run`. Each attempt is queued with `run`, and its
+        deadline and breaker check only apply once it leaves the queue, so
+        time spent waiting for a rate-limit slot never times out a request.
+        Attempts are not hedged, since a hedge would bypass the queue's
+        limits. Rate-limit errors are left to the queue to retry.
+
+        Args:
+            run: Runs an attempt in the queue and blocks for its result.
+            make_call: Creates the coroutine doing the request.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return run(lambda: self.attempt_async(make_call))
+            except Exception as exc:
+                if attempt == self.max_retries or not is_transport_failure(exc):
+                    raise
+                time.sleep(self._retry_delay(attempt, exc))
+
+    async def attempt_async(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs one attempt of a coroutine call with the deadline and the
+        circuit breaker, but no hedging or retries. Only transport failures
+        count towards the breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+            TimeoutError: If the request did not finish within the deadline.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit breaker is open")
+        try:
+            result = await self._attempt_async(make_call)
+        except Exception as exc:
+            if is_transport_failure(exc):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_ignored()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _attempt_async(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        task = asyncio.ensure_future(make_call())
+        try:
+            done, _ = await asyncio.wait([task], timeout=self.timeout)
+            if not done:
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"{self.name} call exceeded its {self.timeout:g}s deadline")
+            result = task.result()
+            with self._lock:
+                self._latencies.append(time.monotonic() - start)
+            return result
+        finally:
+            # A request that missed the deadline is abandoned
+            task.cancel()
+
+    def _retry_delay(self, attempt: int, exc: Exception) -> float:
+        delay = self.backoff_base * 2**attempt * random.uniform(0.5, 1.5)
+        print(f"{self.name} call failed ({exc!r}), retrying in {delay:.1f}s")
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def _attempt(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        started = threading.Event()
+
+        def run():
+            started.set()
+            return fn(*args, **kwargs)
+
+        # Time spent waiting for a free thread counts against the deadline,
+        # so an attempt never blocks its caller for more than `timeout`
+        deadline = time.monotonic() + self.timeout
+        futures = [self._executor.submit(run)]
+        if not started.wait(self.timeout):
+            futures[0].cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"{self.name} call found no free thread within {self.timeout:g}s")
+        start = time.monotonic()
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and start + hedge_delay < deadline:
+            done, _ = concurrent.futures.wait(futures, timeout=hedge_delay)
+            if not done:
+                with self._lock:
+                    self.hedges += 1
+                futures.append(self._executor.submit(fn, *args, **kwargs))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    with self._lock:
+                        self._latencies.append(time.monotonic() - start)
+                    return future.result()
+                error = future.exception()
+
+        if error is not None and not pending:
+            raise error
+        with self._lock:
+            self.timeouts += 1
+        raise TimeoutError(f"{self.name} call exceeded its {self.timeout:g}s deadline")
+
+    def _hedge_delay(self) -> float | None:
+        with self._lock:
+            return self._percentile_latency()
+
+    def _percentile_latency(self) -> float | None:
+        # Callers hold self._lock
+        if not self.hedge_percentile or len(self._latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(int(self.hedge_percentile * len(latencies)), len(latencies) - 1)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hedge_delay = self._percentile_latency()
+            return {
+                "breaker_state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "hedge_delay": round(hedge_delay, 4) if hedge_delay is not None else None,
+                "hedges": self.hedges,
+                "timeouts": self.timeouts,
+                "retries": self.retries,
+            }
+
+
+def create_resilient_caller(prefix: str, name: str) -> ResilientCaller:
+    """
+    Creates a resilient caller configured from `<prefix>_`-prefixed
+    environment variables: `TIMEOUT_SECONDS`, `HEDGE_PERCENTILE` (0 disables
+    hedging), `MAX_RETRIES`, `BREAKER_FAILURES` and `BREAKER_RESET_SECONDS`.
+    A call blocks for at most `(MAX_RETRIES + 1) * TIMEOUT_SECONDS` plus
+    backoff.
+    """
+    return ResilientCaller(
+        name,
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", "120")),
+        hedge_percentile=float(os.getenv(f"{prefix}_HEDGE_PERCENTILE", "0.95")),
+        max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", "2")),
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv(f"{prefix}_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv(f"{prefix}_BREAKER_RESET_SECONDS", "60")),
+        ),
+    )
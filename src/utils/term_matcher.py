@@ -0,0 +1,175 @@
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+
+from src.utils.medical_terms import medical_terms
+
+# Synonyms this short ("TG", "E2", "LH") are only trusted when written exactly
+# as listed, since their lowercase forms show up inside ordinary words
+CASE_SENSITIVE_MAX_LEN = 3
+
+# Folded form of every character seen so far; documents reuse a small alphabet
+_folded_chars: dict[str, str] = {}
+
+
+def _fold_char(char: str) -> str:
+    folded = _folded_chars.get(char)
+    if folded is None:
+        folded = "".join(
+            part
+            for part in unicodedata.normalize("NFKD", char)
+            if not unicodedata.combining(part)
+        ).casefold()
+        _folded_chars[char] = folded
+    return folded
+
+
+@dataclass(frozen=True)
+class TermMatch:
+    canonical: str
+    synonym: str
+    start: int
+    end: int
+
+
+def fold_text(text: str) -> tuple[str, list[int]]:
+    """
+    Folds text for matching: accents removed, case folded and every run of
+    whitespace collapsed to a single space.
+
+    Returns:
+        The folded text and, for each folded character, the index of the
+        original character it came from. The map has one extra trailing
+        entry equal to len(text), so folded end offsets map back too.
+    """
+    folded = []
+    offsets = []
+    previous_space = False
+    for index, char in enumerate(text):
+        if char.isspace():
+            if not previous_space:
+                folded.append(" ")
+                offsets.append(index)
+            previous_space = True
+            continue
+        previous_space = False
+        for folded_char in _fold_char(char):
+            folded.append(folded_char)
+            offsets.append(index)
+    offsets.append(len(text))
+    return "".join(folded), offsets
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over every synonym of a term dictionary.
+
+    Built once, it finds all canonical terms in a text in a single pass,
+    linear in the text length regardless of the number of synonyms. Matching
+    is accent and case insensitive (except for short acronyms), whitespace
+    runs match a single space, and a synonym only matches at word boundaries.
+    """
+
+    def __init__(self, terms: dict[str, list[str]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._output: list[list[int]] = [[]]
+        # (canonical, synonym, folded length) per pattern id
+        self._patterns: list[tuple[str, str, int]] = []
+
+        # Only listed synonyms match: a canonical name is a key, and may be a
+        # broader word ("Hemoglobina") than the analyte it stands for
+        for canonical, synonyms in terms.items():
+            for synonym in dict.fromkeys(synonyms):
+                folded, _ = fold_text(synonym.strip())
+                if folded:
+                    self._add(folded, (canonical, synonym.strip(), len(folded)))
+        self._build_failure_links()
+
+    def _add(self, folded: str, pattern: tuple[str, str, int]) -> None:
+        state = 0
+        for char in folded:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self._patterns))
+        self._patterns.append(pattern)
+
+    def _build_failure_links(self) -> None:
+        """
+        Computes failure links breadth-first, then folds them into a full
+        transition table so matching never walks failure chains.
+        """
+        fail = [0] * len(self._goto)
+        self._delta: list[dict[str, int]] = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        frontier = deque(self._goto[0].values())
+        while frontier:
+            state = frontier.popleft()
+            self._delta[state] = {**self._delta[fail[state]], **self._goto[state]}
+            for char, next_state in self._goto[state].items():
+                frontier.append(next_state)
+                fail[next_state] = self._delta[fail[state]].get(char, 0)
+                self._output[next_state].extend(self._output[fail[next_state]])
+
+    def find_all(self, text: str) -> list[TermMatch]:
+        """
+        Finds every term occurrence in the text.
+
+        Overlapping candidates are resolved leftmost-longest, so "Colesterol
+        HDL" is reported once rather than also as "HDL".
+
+        Args:
+            text: The text to search.
+
+        Returns:
+            Non-overlapping matches in text order, with offsets into `text`.
+        """
+        folded, offsets = fold_text(text)
+        candidates = []
+        state = 0
+        delta = self._delta
+        for position, char in enumerate(folded):
+            state = delta[state].get(char, 0)
+            for pattern_id in self._output[state]:
+                canonical, synonym, length = self._patterns[pattern_id]
+                start = position + 1 - length
+                end = position + 1
+                if not self._at_word_boundaries(folded, start, end):
+                    continue
+                original_start, original_end = offsets[start], offsets[end]
+                if len(synonym) <= CASE_SENSITIVE_MAX_LEN and (
+                    text[original_start:original_end] != synonym
+                ):
+                    continue
+                candidates.append(
+                    TermMatch(canonical, synonym, original_start, original_end)
+                )
+
+        matches = []
+        last_end = -1
+        for match in sorted(candidates, key=lambda m: (m.start, -m.end)):
+            if match.start >= last_end:
+                matches.append(match)
+                last_end = match.end
+        return matches
+
+    def find_terms(self, text: str) -> list[str]:
+        """Returns the sorted unique canonical names found in the text."""
+        return sorted({match.canonical for match in self.find_all(text)})
+
+    @staticmethod
+    def _at_word_boundaries(folded: str, start: int, end: int) -> bool:
+        # Only edges that are word characters need a boundary: "K+" may be
+        # followed by anything, but "K" must not be preceded by a letter
+        if folded[start].isalnum() and start > 0 and folded[start - 1].isalnum():
+            return False
+        if folded[end - 1].isalnum() and end < len(folded) and folded[end].isalnum():
+            return False
+        return True
+
+
+term_matcher = TermMatcher(medical_terms)
@@ -0,0 +1,41 @@
+import pytest
+
+from src.extraction.batching import extract_in_batches, pack_batches
+from src.utils.resilience import CircuitOpenError
+
+
+def test_pack_batches_keeps_page_order_within_the_budget():
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 400]
+
+    assert pack_batches(texts, token_budget=25) == [[0, 1], [2], [3]]
+
+
+def test_unmappable_response_is_split_until_it_maps():
+    calls = []
+
+    def extract_batch(texts):
+        calls.append(len(texts))
+        if len(texts) > 2:
+            raise ValueError("Expected 4 page results in the batch response")
+        return [{"page": text} for text in texts]
+
+    results = extract_in_batches(extract_batch, lambda text: {"page": text}, ["1", "2", "3", "4"])
+
+    assert results == [{"page": "1"}, {"page": "2"}, {"page": "3"}, {"page": "4"}]
+    assert calls == [4, 2, 2]
+
+
+@pytest.mark.parametrize("error", [CircuitOpenError("open"), TimeoutError("deadline")])
+def test_provider_failure_is_raised_without_splitting(error):
+    calls = []
+
+    def extract_batch(texts):
+        calls.append(len(texts))
+        raise error
+
+    def extract_page(text):
+        raise AssertionError("single pages must not be retried against a failing provider")
+
+    with pytest.raises(type(error)):
+        extract_in_batches(extract_batch, extract_page, ["1", "2", "3", "4"])
+    assert calls == [4]
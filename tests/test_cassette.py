@@ -0,0 +1,45 @@
+import pytest
+
+from src.utils.cassette import CassetteMissError, CassetteTransport
+from src.utils.disk_cache import DiskCache
+
+REQUEST = {"model": "mistral-ocr-latest", "document": "page-1"}
+
+
+def make_transport(tmp_path, mode: str) -> CassetteTransport:
+    store = DiskCache(str(tmp_path / "cassettes"), max_bytes=1_000_000)
+    return CassetteTransport("mistral", store, mode=mode)
+
+
+def call(transport: CassetteTransport, request: dict, live) -> dict:
+    return transport.call(
+        request,
+        live,
+        encode=lambda response: response["pages"],
+        decode=lambda pages: {"pages": pages, "replayed": True},
+    )
+
+
+def test_recorded_response_is_replayed_without_the_provider(tmp_path):
+    live_calls = []
+
+    def live():
+        live_calls.append(1)
+        return {"pages": ["markdown"]}
+
+    assert call(make_transport(tmp_path, "record"), REQUEST, live) == {"pages": ["markdown"]}
+
+    def offline():
+        raise AssertionError("replay mode must not call the provider")
+
+    replayed = call(make_transport(tmp_path, "replay"), REQUEST, offline)
+
+    assert replayed == {"pages": ["markdown"], "replayed": True}
+    assert live_calls == [1]
+
+
+def test_replay_raises_for_a_request_without_a_recording(tmp_path):
+    call(make_transport(tmp_path, "record"), REQUEST, lambda: {"pages": ["markdown"]})
+
+    with pytest.raises(CassetteMissError):
+        call(make_transport(tmp_path, "replay"), {**REQUEST, "document": "page-2"}, lambda: None)
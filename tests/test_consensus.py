@@ -0,0 +1,40 @@
+from src.extraction.consensus import reconcile_results
+
+
+def test_most_voted_value_wins_after_normalization():
+    extractions = [
+        (0, "MarkerOcrStrategy", {"TSH": "2,10 µUI/mL"}),
+        (0, "MistralOcrStrategy", {"TSH": "2.10 µUI/mL"}),
+        (0, "PyMuPdfOcrStrategy", {"TSH": "2,70 µUI/mL"}),
+    ]
+
+    assert reconcile_results(extractions) == {"TSH": "2.10 µUI/mL"}
+
+
+def test_ties_follow_page_then_strategy_priority_not_completion_order():
+    extractions = [
+        (0, "MarkerOcrStrategy", {"Glicose": "96 mg/dL"}),
+        (0, "PyMuPdfOcrStrategy", {"Glicose": "92 mg/dL"}),
+    ]
+
+    assert reconcile_results(extractions) == {"Glicose": "92 mg/dL"}
+    assert reconcile_results(list(reversed(extractions))) == {"Glicose": "92 mg/dL"}
+
+
+def test_rules_win_ties_against_ocr_engines():
+    extractions = [
+        (0, "PyMuPdfOcrStrategy", {"Glicemia": "93 mg/dL"}),
+        (0, "rules", {"Glicemia": "92 mg/dL"}),
+    ]
+
+    assert reconcile_results(extractions) == {"Glicemia": "92 mg/dL"}
+
+
+def test_tests_keep_first_seen_order_and_skip_empty_results():
+    extractions = [
+        (1, "PyMuPdfOcrStrategy", {"TSH": "2,10 µUI/mL"}),
+        (0, "PyMuPdfOcrStrategy", None),
+        (0, "MistralOcrStrategy", {"Insulina": "8,2 µUI/mL"}),
+    ]
+
+    assert list(reconcile_results(extractions)) == ["Insulina", "TSH"]
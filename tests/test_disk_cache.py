@@ -0,0 +1,80 @@
+import os
+
+from src.utils import disk_cache
+from src.utils.disk_cache import DiskCache
+
+PAYLOAD = {"value": "x" * 100}
+
+
+def make_cache(tmp_path, **options) -> DiskCache:
+    return DiskCache(str(tmp_path / "cache"), **{"max_bytes": 10_000, **options})
+
+
+def age(cache: DiskCache, key: str, mtime: float) -> None:
+    os.utime(cache._path_for(key), (mtime, mtime))
+
+
+def test_roundtrip_and_stats(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("aa1", PAYLOAD)
+
+    assert cache.get("aa1")["value"] == PAYLOAD["value"]
+    assert cache.get("bb2") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted_first(tmp_path):
+    cache = make_cache(tmp_path)
+    for i, key in enumerate(["aa1", "bb2", "cc3"]):
+        cache.set(key, PAYLOAD)
+        age(cache, key, 1000 + i)
+    entry_size = cache.stats()["size_bytes"] // 3
+    # Room for three entries: a fourth one evicts down to 90% of the budget
+    cache.max_bytes = entry_size * 3 + entry_size // 2
+
+    assert cache.get("aa1") is not None  # now the most recently used
+    cache.set("dd4", PAYLOAD)
+
+    assert cache.get("bb2") is None
+    assert all(cache.get(key) is not None for key in ["aa1", "cc3", "dd4"])
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses_and_removed(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, ttl=60)
+    now = 1_000_000.0
+    monkeypatch.setattr(disk_cache.time, "time", lambda: now)
+    cache.set("aa1", PAYLOAD)
+
+    now += 59
+    assert cache.get("aa1") is not None
+    now += 2
+    assert cache.get("aa1") is None
+    assert not cache._path_for("aa1").exists()
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_size_is_recovered_from_disk_on_restart(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set("aa1", PAYLOAD)
+    cache.set("bb2", PAYLOAD)
+
+    reopened = make_cache(tmp_path)
+
+    assert reopened.stats()["size_bytes"] == cache.stats()["size_bytes"]
+    assert reopened.stats()["entries"] == 2
+
+
+def test_budget_counts_entries_written_by_other_processes(tmp_path):
+    cache = make_cache(tmp_path)
+    other = make_cache(tmp_path)
+    for key in ["aa1", "bb2", "cc3"]:
+        other.set(key, PAYLOAD)
+    entry_size = other.stats()["size_bytes"] // 3
+    cache.max_bytes = entry_size * 3 + entry_size // 2
+
+    cache.set("dd4", PAYLOAD)
+
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,29 @@
+import threading
+
+from src.pipeline.executors import FairThreadPoolExecutor
+
+
+def test_owners_take_turns_on_the_workers():
+    executor = FairThreadPoolExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    try:
+        # Holds the only worker until every task is queued
+        executor.submit(hold, owner="A")
+        started.wait(5)
+        futures = [executor.submit(order.append, f"A{i}", owner="A") for i in range(10)]
+        futures.append(executor.submit(order.append, "B", owner="B"))
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        executor.shutdown()
+
+    assert order[:3] == ["A0", "B", "A1"]
+    assert order[2:] == [f"A{i}" for i in range(1, 10)]
@@ -0,0 +1,20 @@
+import threading
+
+from api.jobs import JobManager
+
+
+def test_jobs_dropped_at_shutdown_fail_and_clean_up():
+    release = threading.Event()
+    cleaned = []
+    manager = JobManager(max_workers=1)
+
+    running = manager.submit("a.pdf", ("ocr",), lambda progress: release.wait(5), lambda: cleaned.append("a"))
+    queued = manager.submit("b.pdf", ("ocr",), lambda progress: None, lambda: cleaned.append("b"))
+    manager.shutdown()
+    release.set()
+
+    assert queued.status == "failed"
+    assert queued.finished_at is not None
+    assert "b" in cleaned
+    assert running.status in ("running", "completed")
+
@@ -0,0 +1,53 @@
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from api.limits import UploadSizeLimitMiddleware
+from api.main import http_exception_handler
+
+
+def make_client(limit):
+    app = FastAPI()
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": limit})
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_body_over_the_limit_is_refused():
+    client = make_client(10)
+
+    assert client.post("/upload", content=b"x" * 10).json() == {"size": 10}
+    assert client.post("/upload", content=b"x" * 11).status_code == 413
+
+
+def test_chunked_body_is_counted_as_it_arrives():
+    client = make_client(10)
+
+    response = client.post("/upload", content=iter([b"x" * 6, b"x" * 6]))
+
+    assert response.status_code == 413
+
+
+def test_paths_without_a_limit_are_untouched():
+    client = make_client(10)
+
+    assert client.post("/other", content=b"x" * 100).json() == {"size": 100}
+
+
+def test_both_overflow_paths_answer_with_the_same_error_body():
+    client = make_client(10)
+
+    declared = client.post("/upload", content=b"x" * 11).json()
+    streamed = client.post("/upload", content=iter([b"x" * 6, b"x" * 6])).json()
+
+    assert declared.keys() == streamed.keys() == {"status", "message", "timestamp", "details"}
+    assert declared["details"] == streamed["details"] == {"status_code": 413}
+    assert declared["message"] == streamed["message"]
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import api.main as service
+
+
+def test_job_status_does_not_wait_for_the_extractor_to_initialize():
+    client = TestClient(service.app)
+    release = threading.Event()
+
+    # Stands in for a request importing DSPy while building the extractor
+    def initialize():
+        with service._extractor_lock:
+            release.wait(5)
+
+    initializer = threading.Thread(target=initialize)
+    initializer.start()
+    try:
+        start = time.monotonic()
+        response = client.get("/jobs/missing")
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+        initializer.join()
+
+    assert response.status_code == 404
+    assert elapsed < 2
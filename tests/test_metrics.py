@@ -0,0 +1,35 @@
+from src.utils.metrics import Counter, Histogram, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.register(
+        Histogram("stage_seconds", "Stage duration.", labels=("stage",), buckets=(0.1, 1))
+    )
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, stage="ocr")
+
+    assert registry.render().splitlines() == [
+        "# HELP stage_seconds Stage duration.",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="ocr",le="0.1"} 1',
+        'stage_seconds_bucket{stage="ocr",le="1"} 3',
+        'stage_seconds_bucket{stage="ocr",le="+Inf"} 4',
+        'stage_seconds_sum{stage="ocr"} 6.05',
+        'stage_seconds_count{stage="ocr"} 4',
+    ]
+
+
+def test_counter_renders_one_line_per_label_combination():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("pages_total", "Pages seen.", labels=("outcome",)))
+    counter.inc(outcome="processed")
+    counter.inc(2, outcome="processed")
+    counter.inc(outcome="skipped")
+
+    assert registry.render().splitlines() == [
+        "# HELP pages_total Pages seen.",
+        "# TYPE pages_total counter",
+        'pages_total{outcome="processed"} 3',
+        'pages_total{outcome="skipped"} 1',
+    ]
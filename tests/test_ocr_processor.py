@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import fitz  # pymupdf
+
+from src.ocr.processor import OcrProcessor
+from src.ocr.strategies import MarkerOcrStrategy, MistralOcrStrategy, PyMuPdfOcrStrategy
+from src.utils.file_utils import fitz_lock
+
+# Scores about 0.9, well over the default cascade threshold of 0.6
+GOOD_TEXT = "Colesterol total: 180 mg/dL\nCreatinina: 0,9 mg/dL\nUreia: 30 mg/dL\nTriglicerídeos: 120 mg/dL\n" * 4
+# Scores about 0.2
+POOR_TEXT = "Creatinina 0,9"
+
+
+class FakeStrategy:
+    def __init__(self, name: str, text: str, calls: list):
+        self.name = name
+        self.text = text
+        self.calls = calls
+
+    def execute_bytes(self, data: bytes, file_type: str = "pdf") -> str:
+        self.calls.append(self.name)
+        return self.text
+
+
+class FakeMistral:
+    """Answers document requests with the text layer of each merged page."""
+
+    def __init__(self):
+        self.sent = []
+
+    def execute_document(self, data: bytes) -> dict[int, str]:
+        with fitz_lock:
+            doc = fitz.open(stream=data, filetype="pdf")
+            labels = [page.get_text().strip() for page in doc]
+            doc.close()
+        self.sent.append(labels)
+        return {i: f"{GOOD_TEXT}\n{label}" for i, label in enumerate(labels)}
+
+
+def make_page(label: str) -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), label)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_processor(mode: str, instances: dict) -> OcrProcessor:
+    processor = OcrProcessor(mode=mode, document_mode=True)
+    processor._instances.update(instances)
+    return processor
+
+
+def test_execute_document_maps_pages_by_their_index():
+    requests = []
+
+    def process(**request):
+        requests.append(request)
+        return SimpleNamespace(pages=[
+            SimpleNamespace(index=1, markdown="second"),
+            SimpleNamespace(index=0, markdown="first"),
+        ])
+
+    strategy = MistralOcrStrategy.__new__(MistralOcrStrategy)
+    strategy.transport = None
+    strategy.caller = SimpleNamespace(call=lambda fn, **request: fn(**request))
+    strategy.client = SimpleNamespace(ocr=SimpleNamespace(process=process))
+
+    assert strategy.execute_document(b"%PDF") == {0: "first", 1: "second"}
+    assert requests[0]["include_image_base64"] is False
+
+
+def test_complete_document_adds_mistral_text_to_every_page_in_parallel_mode():
+    mistral = FakeMistral()
+    processor = make_processor("parallel", {MistralOcrStrategy: mistral})
+    pages = [make_page(f"page {i}") for i in range(3)]
+    results = [{"PyMuPdfOcrStrategy": f"text {i}"} for i in range(3)]
+
+    results = processor.complete_document(pages, results)
+
+    assert mistral.sent == [["page 0", "page 1", "page 2"]]
+    for i, result in enumerate(results):
+        assert result["PyMuPdfOcrStrategy"] == f"text {i}"
+        assert result["MistralOcrStrategy"].endswith(f"page {i}")
+
+
+def test_complete_document_only_replaces_pages_below_the_threshold_in_cascade_mode():
+    mistral = FakeMistral()
+    processor = make_processor("cascade", {MistralOcrStrategy: mistral})
+    pages = [make_page(f"page {i}") for i in range(3)]
+    results = [
+        {"PyMuPdfOcrStrategy": POOR_TEXT},
+        {"PyMuPdfOcrStrategy": GOOD_TEXT},
+        {"PyMuPdfOcrStrategy": POOR_TEXT},
+    ]
+
+    results = processor.complete_document(pages, results)
+
+    assert mistral.sent == [["page 0", "page 2"]]
+    assert results[0] == {"MistralOcrStrategy": f"{GOOD_TEXT}\npage 0"}
+    assert results[1] == {"PyMuPdfOcrStrategy": GOOD_TEXT}
+    assert results[2] == {"MistralOcrStrategy": f"{GOOD_TEXT}\npage 2"}
+
+
+def make_cascade(texts: dict, calls: list) -> OcrProcessor:
+    processor = OcrProcessor(mode="cascade")
+    for strategy_class in (PyMuPdfOcrStrategy, MarkerOcrStrategy, MistralOcrStrategy):
+        name = strategy_class.__name__
+        processor._instances[strategy_class] = FakeStrategy(name, texts[name], calls)
+    return processor
+
+
+def test_cascade_stops_at_the_first_page_over_the_threshold():
+    calls = []
+    processor = make_cascade(
+        {"PyMuPdfOcrStrategy": GOOD_TEXT, "MarkerOcrStrategy": "", "MistralOcrStrategy": ""}, calls
+    )
+
+    assert processor.process_bytes(b"%PDF") == {"PyMuPdfOcrStrategy": GOOD_TEXT}
+    assert calls == ["PyMuPdfOcrStrategy"]
+
+
+def test_cascade_escalates_in_order_while_below_the_threshold():
+    calls = []
+    processor = make_cascade(
+        {
+            "PyMuPdfOcrStrategy": POOR_TEXT,
+            "MarkerOcrStrategy": "Colesterol total: 180 mg/dL",
+            "MistralOcrStrategy": GOOD_TEXT,
+        },
+        calls,
+    )
+
+    assert processor.process_bytes(b"%PDF") == {"MistralOcrStrategy": GOOD_TEXT}
+    assert calls == ["PyMuPdfOcrStrategy", "MarkerOcrStrategy", "MistralOcrStrategy"]
+    assert not processor.needs_escalation({"MistralOcrStrategy": GOOD_TEXT})
+    assert processor.needs_escalation({"PyMuPdfOcrStrategy": POOR_TEXT})
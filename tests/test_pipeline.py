@@ -0,0 +1,271 @@
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import fitz  # pymupdf
+import pytest
+
+from src.extraction.rules import RuleBasedExtractor
+from src.ocr.relevance import PageRelevanceFilter
+from src.pipeline import runner
+from src.pipeline.executors import StageExecutors
+from src.pipeline.runner import LabPipeline, _BatchBuffer
+from src.utils.file_utils import extract_pdf_page, fitz_lock, iter_pdf_pages, open_pdf
+
+
+class FakeOcrProcessor:
+    document_mode = False
+    mode = "parallel"
+
+    def __init__(self, texts: list[str]):
+        self.texts = iter(texts)
+
+    def process_bytes(self, data: bytes, file_type: str = "pdf") -> dict[str, str]:
+        return {"PyMuPdfOcrStrategy": next(self.texts)}
+
+
+class FakeExtractor:
+    def __init__(self, results: dict):
+        self.results = results
+        self.calls = []
+
+    def extract(self, document_text: str, use_cache: bool = True) -> dict:
+        self.calls.append(document_text)
+        return self.results
+
+
+def make_pdf(page_count: int) -> bytes:
+    doc = fitz.open()
+    for _ in range(page_count):
+        doc.new_page()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_fallback_mode_does_not_mix_rule_and_llm_names():
+    # Glicose is resolved by the rules, Insulina is not, so the page goes to the LLM
+    page = "Glicose em jejum: 92 mg/dL\nInsulina: ver laudo anexo"
+    extractor = FakeExtractor({"Glicose em jejum": "92 mg/dL", "Insulina": "8,2 µUI/mL"})
+    pipeline = LabPipeline(FakeOcrProcessor([page]), extractor, rule_mode="fallback")
+
+    result = pipeline.run(make_pdf(1))
+
+    assert extractor.calls == [page]
+    assert result.results == {"Glicose em jejum": "92 mg/dL", "Insulina": "8,2 µUI/mL"}
+
+
+def test_fallback_mode_skips_the_llm_for_resolved_pages():
+    page = "Glicose em jejum: 92 mg/dL\nInsulina: 8,2 µUI/mL"
+    extractor = FakeExtractor({})
+    pipeline = LabPipeline(FakeOcrProcessor([page]), extractor, rule_mode="fallback")
+
+    result = pipeline.run(make_pdf(1))
+
+    assert extractor.calls == []
+    assert result.results == {"Glicemia": "92 mg/dL", "Insulina": "8,2 µUI/mL"}
+
+
+def test_skipped_pages_are_neither_split_nor_counted_as_processed(monkeypatch):
+    split_pages = []
+
+    def record_split(doc, page_num):
+        split_pages.append(page_num)
+        return extract_pdf_page(doc, page_num)
+
+    monkeypatch.setattr(runner, "extract_pdf_page", record_split)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Glicose em jejum: 92 mg/dL")
+    doc.new_page().insert_text(
+        (72, 72), "Resultados liberados eletronicamente. Assinatura digital do responsável técnico."
+    )
+    data = doc.tobytes()
+    doc.close()
+    extractor = FakeExtractor({"Glicose em jejum": "92 mg/dL"})
+    pipeline = LabPipeline(
+        FakeOcrProcessor(["Glicose em jejum: 92 mg/dL"]), extractor, page_filter=PageRelevanceFilter()
+    )
+
+    result = pipeline.run(data)
+
+    assert result.pages_processed == 1
+    assert [skipped["page"] for skipped in result.skipped_pages] == [2]
+    assert split_pages == [0]
+
+
+class TextLayerOcrProcessor:
+    """Thread-safe fake that reads each page's text layer, optionally adding
+    document-level "Mistral" text that changes every value."""
+
+    mode = "parallel"
+
+    def __init__(self, document_mode: bool = False):
+        self.document_mode = document_mode
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.documents = []
+
+    def process_bytes(self, data: bytes, file_type: str = "pdf") -> dict[str, str]:
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            with fitz_lock:
+                doc = fitz.open(stream=data, filetype="pdf")
+                text = doc[0].get_text()
+                doc.close()
+            time.sleep(0.01)
+            return {"PyMuPdfOcrStrategy": text}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def complete_document(self, pages: list[bytes], results: list[dict]) -> list[dict]:
+        self.documents.append(len(pages))
+        return [
+            {"MistralOcrStrategy": result["PyMuPdfOcrStrategy"].replace(": 9", ": 8")}
+            for result in results
+        ]
+
+
+class RuleBackedExtractor:
+    """Thread-safe fake LLM that answers with the rule-based extractor."""
+
+    def __init__(self):
+        self.rules = RuleBasedExtractor()
+        self.texts = []
+        self.batches = []
+
+    def extract(self, document_text: str, use_cache: bool = True) -> dict:
+        self.texts.append(document_text)
+        return self.rules.extract(document_text).results
+
+    def extract_batch(self, page_texts: list[str], use_cache: bool = True) -> list[dict]:
+        self.batches.append(len(page_texts))
+        self.texts.extend(page_texts)
+        return [self.rules.extract(text).results for text in page_texts]
+
+
+def make_report(page_count: int) -> bytes:
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page()
+        lines = [f"Glicose em jejum: {90 + i} mg/dL", f"Creatinina: {i + 1},0 mg/dL"]
+        if i % 3 == 0:
+            lines.append(f"Ferritina: {95 + i} ng/mL")
+        page.insert_text((72, 72), "\n".join(lines))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def run_both(data: bytes, make_processor, **options):
+    sequential = LabPipeline(make_processor(), RuleBackedExtractor(), **options).run(data)
+    executors = StageExecutors()
+    processor = make_processor()
+    extractor = RuleBackedExtractor()
+    try:
+        streaming = LabPipeline(processor, extractor, executors, **options).run(data)
+    finally:
+        executors.shutdown()
+    return sequential, streaming, processor, extractor
+
+
+@pytest.mark.parametrize("max_pending_pages", [1, 8])
+def test_streaming_matches_sequential_with_batching(max_pending_pages):
+    data = make_report(7)
+
+    sequential, streaming, processor, extractor = run_both(
+        data, TextLayerOcrProcessor, max_pending_pages=max_pending_pages, batch_token_budget=40
+    )
+
+    assert streaming.results == sequential.results
+    assert streaming.results["Glicemia"] == "90 mg/dL"
+    assert streaming.pages_processed == 7
+    assert processor.max_active <= max_pending_pages
+    # Every page is extracted exactly once
+    assert sorted(extractor.texts) == sorted(
+        TextLayerOcrProcessor().process_bytes(page)["PyMuPdfOcrStrategy"] for page in split(data)
+    )
+    if max_pending_pages == 1:
+        # A page waiting in the batch buffer would hold the only slot
+        assert set(extractor.batches) <= {1}
+    else:
+        assert any(size > 1 for size in extractor.batches)
+
+
+def test_streaming_defers_extraction_until_document_ocr():
+    data = make_report(4)
+
+    sequential, streaming, processor, extractor = run_both(
+        data,
+        lambda: TextLayerOcrProcessor(document_mode=True),
+        max_pending_pages=2,
+        extraction_mode="best",
+    )
+
+    assert streaming.results == sequential.results
+    assert processor.documents == [4]
+    # Every extraction saw the document-level text, never the first pass
+    assert len(extractor.texts) == 4
+    assert all(": 9" not in text for text in extractor.texts)
+    assert streaming.results["Glicemia"] == "80 mg/dL"
+
+
+def split(data: bytes) -> list[bytes]:
+    doc = open_pdf(data)
+    try:
+        return list(iter_pdf_pages(doc))
+    finally:
+        doc.close()
+
+
+class InlineExecutors:
+    def __init__(self):
+        self.batches = []
+
+    def submit(self, stage, fn, label, units, recorder, owner=None):
+        self.batches.append((label, [page_index for page_index, _ in units]))
+        future = Future()
+        future.set_result(None)
+        return future
+
+
+def test_batch_buffer_holds_the_last_batch_until_flushed():
+    executors = InlineExecutors()
+    pipeline = SimpleNamespace(batch_token_budget=25, executors=executors, _extract_units=None)
+    buffer = _BatchBuffer(pipeline, recorder=None)
+    done = []
+
+    # Pages arrive out of order, about 11 tokens each, so two fit a batch
+    for page_index in [1, 0, 3, 2, 4]:
+        buffer.add(page_index, "text", "x" * 40, lambda page_index=page_index: done.append(page_index))
+
+    assert executors.batches == [("text", [0, 1]), ("text", [2, 3])]
+    assert buffer.waiting_pages() == 1
+
+    buffer.flush()
+
+    assert executors.batches[-1] == ("text", [4])
+    assert buffer.waiting_pages() == 0
+    assert sorted(done) == [0, 1, 2, 3, 4]
+
+
+def test_streaming_stops_the_producer_when_the_consumer_fails():
+    executors = StageExecutors()
+    pipeline = LabPipeline(
+        TextLayerOcrProcessor(), RuleBackedExtractor(), executors, max_pending_pages=1
+    )
+
+    def progress(stage, done, total):
+        if stage == "ocr" and done == 1:
+            raise RuntimeError("progress callback failed")
+
+    try:
+        with pytest.raises(RuntimeError):
+            pipeline.run(make_report(6), progress=progress)
+    finally:
+        executors.shutdown()
+    assert not any(thread.name == "ocr-producer" for thread in threading.enumerate())
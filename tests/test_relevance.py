@@ -0,0 +1,45 @@
+from src.ocr.relevance import PageRelevanceFilter
+
+DISCLAIMER = (
+    "Laboratório de Análises Clínicas - Unidade Centro\n"
+    "Resultados liberados eletronicamente. Assinatura digital do responsável técnico.\n"
+    "A interpretação dos resultados deve ser feita pelo médico solicitante. Página 4 de 4."
+)
+
+
+def test_page_with_dictionary_terms_is_relevant():
+    relevance = PageRelevanceFilter().classify_text(
+        "Paciente: PACIENTE 1234\nGlicose em jejum: 92 mg/dL\nValores de referência: 70 a 99 mg/dL"
+    )
+
+    assert (relevance.relevant, relevance.reason) == (True, "lab_terms")
+
+
+def test_results_outside_the_dictionary_are_kept():
+    relevance = PageRelevanceFilter().classify_text(
+        "Cálcio total: 9,4 mg/dL\nValores de referência: 8,6 a 10,3 mg/dL\n"
+        "Magnésio: 2,0 mg/dL\nAlbumina: 4,2 g/dL\nPSA total: 0,8 ng/mL"
+    )
+
+    assert relevance.term_hits == 0
+    assert (relevance.relevant, relevance.reason) == (True, "lab_values")
+
+
+def test_result_label_alone_is_enough():
+    relevance = PageRelevanceFilter().classify_text(
+        "EXAME DE URINA TIPO I\nCor: amarelo citrino\nAspecto: límpido\nResultado: negativo para nitritos"
+    )
+
+    assert relevance.relevant
+
+
+def test_page_without_lab_content_is_skipped():
+    relevance = PageRelevanceFilter().classify_text(DISCLAIMER)
+
+    assert (relevance.relevant, relevance.reason) == (False, "no_lab_content")
+
+
+def test_page_without_text_layer_is_kept():
+    relevance = PageRelevanceFilter().classify_text("  \n Pág. 2 \n")
+
+    assert (relevance.relevant, relevance.reason) == (True, "no_text_layer")
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.extraction.scheduler import LlmScheduler
+from src.utils.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+def make_caller(**options) -> ResilientCaller:
+    options = {"timeout": 1.0, "backoff_base": 0.0, "hedge_percentile": 0, **options}
+    return ResilientCaller("test", **options)
+
+
+def test_call_queued_does_not_count_queue_wait_against_the_deadline():
+    scheduler = LlmScheduler(requests_per_minute=6000, max_concurrency=1)
+    caller = make_caller(timeout=0.5, max_retries=0)
+
+    async def request():
+        await asyncio.sleep(0.3)
+        return "ok"
+
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            # The second call waits about 0.3s for the only slot, 0.6s in all
+            results = list(pool.map(lambda _: caller.call_queued(scheduler.run, request), range(2)))
+    finally:
+        scheduler.shutdown()
+    assert results == ["ok", "ok"]
+    assert caller.stats()["timeouts"] == 0
+
+
+def test_call_queued_cancels_the_request_inside_the_scheduler():
+    scheduler = LlmScheduler(requests_per_minute=6000, max_concurrency=1)
+    caller = make_caller(timeout=0.05, max_retries=0)
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    try:
+        with pytest.raises(TimeoutError):
+            caller.call_queued(scheduler.run, slow)
+        stats = scheduler.stats()
+    finally:
+        scheduler.shutdown()
+    assert cancelled == [1]
+    assert stats["in_flight"] == 0
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+@pytest.mark.parametrize("error", [RateLimitError("429"), ValueError("unparseable response")])
+def test_call_raises_provider_answers_without_retrying_or_tripping_the_breaker(error):
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise error
+
+    caller = make_caller(max_retries=3, breaker=CircuitBreaker("test", failure_threshold=1))
+    with pytest.raises(type(error)):
+        caller.call(request)
+    assert len(calls) == 1
+    assert caller.stats()["breaker_state"] == "closed"
+
+
+def test_call_retries_server_errors_and_counts_them_towards_the_breaker():
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise ServerError("unavailable")
+
+    caller = make_caller(max_retries=1, breaker=CircuitBreaker("test", failure_threshold=2))
+    with pytest.raises(ServerError):
+        caller.call(request)
+    assert len(calls) == 2
+    assert caller.stats()["breaker_state"] == "open"
+
+
+def test_call_counts_waiting_for_a_thread_against_the_deadline():
+    caller = make_caller(timeout=0.5, max_retries=0, max_workers=1)
+
+    with ThreadPoolExecutor(2) as pool:
+        # The second call waits about 0.3s for the only thread, 0.6s in all
+        futures = [pool.submit(caller.call, time.sleep, 0.3) for _ in range(2)]
+        outcomes = [future.exception() for future in futures]
+
+    assert sorted(type(outcome).__name__ for outcome in outcomes) == ["NoneType", "TimeoutError"]
+    assert caller.stats()["timeouts"] == 1
+
+
+def test_call_times_out_when_no_thread_frees_up():
+    release = threading.Event()
+    caller = make_caller(timeout=0.1, max_retries=0, max_workers=1, breaker=CircuitBreaker("test", failure_threshold=1))
+    # Occupies the only thread well past the deadline
+    caller._executor.submit(release.wait, 5)
+
+    try:
+        with pytest.raises(TimeoutError):
+            caller.call(lambda: "ok")
+    finally:
+        release.set()
+    assert caller.stats()["breaker_state"] == "open"
+
+
+def test_call_queued_leaves_rate_limits_to_the_scheduler():
+    scheduler = LlmScheduler(requests_per_minute=6000, max_concurrency=1, max_retries=2)
+    caller = make_caller(max_retries=2, breaker=CircuitBreaker("test", failure_threshold=1))
+    attempts = []
+
+    async def limited_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimitError("429")
+        return "ok"
+
+    try:
+        assert caller.call_queued(scheduler.run, limited_once) == "ok"
+        stats = scheduler.stats()
+    finally:
+        scheduler.shutdown()
+    assert len(attempts) == 2
+    assert stats["rate_limited"] == 1
+    assert caller.stats()["retries"] == 0
+    assert caller.stats()["consecutive_failures"] == 0
+
+
+def test_call_queued_does_not_hedge_past_the_scheduler():
+    scheduler = LlmScheduler(requests_per_minute=6000, max_concurrency=1)
+    caller = make_caller(hedge_percentile=0.5, hedge_min_samples=1)
+    caller._latencies.append(0.01)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    try:
+        assert caller.call_queued(scheduler.run, request) == "ok"
+    finally:
+        scheduler.shutdown()
+    assert len(calls) == 1
+    assert caller.stats()["hedges"] == 0
@@ -0,0 +1,69 @@
+import pytest
+
+from src.extraction.rules import RuleBasedExtractor, parse_brazilian_number
+
+HEMOGRAM_AND_HBA1C = """HEMOGRAMA
+Hemoglobina ......: 14,2 g/dL   Valores de referência: 13,0 a 17,0 g/dL
+Hematócrito ......: 42,0 %
+GLICEMIA PÓS-PRANDIAL: 140 mg/dL
+HEMOGLOBINA GLICADA (HbA1c): 5,4 %
+Valores de referência: 4,0 a 5,6 %
+"""
+
+
+@pytest.fixture
+def extractor():
+    return RuleBasedExtractor()
+
+
+def test_canonical_name_is_not_matched_as_a_synonym(extractor):
+    extraction = extractor.extract(HEMOGRAM_AND_HBA1C)
+
+    # "Hemoglobina" is the key of the HbA1c synonyms, not the hemogram analyte
+    assert extraction.results["Hemoglobina"] == "5,4 %"
+    assert extraction.matches["Hemoglobina"].reference == "4,0 a 5,6 %"
+    # Post-prandial glucose is not the fasting "Glicemia" analyte
+    assert "Glicemia" not in extraction.found_terms
+
+
+def test_panel_header_does_not_take_the_value_of_a_labeled_line(extractor):
+    extraction = extractor.extract(HEMOGRAM_AND_HBA1C)
+
+    assert "Hemograma" in extraction.unresolved_terms
+    assert "Hemograma" not in extraction.results
+
+
+def test_value_on_the_line_after_the_term(extractor):
+    extraction = extractor.extract("TSH\nResultado: 2,10 µUI/mL\nVR: 0,27 a 4,20 µUI/mL")
+
+    assert extraction.results == {"TSH": "2,10 µUI/mL"}
+    assert extraction.matches["TSH"].number == pytest.approx(2.1)
+    assert extraction.matches["TSH"].reference == "0,27 a 4,20 µUI/mL"
+
+
+def test_qualifier_is_kept_with_the_value(extractor):
+    extraction = extractor.extract("Ferritina: Inferior a 5,0 ng/mL")
+
+    assert extraction.results == {"Ferritina": "Inferior a 5,0 ng/mL"}
+
+
+def test_value_without_a_known_unit_is_not_trusted(extractor):
+    extraction = extractor.extract("Creatinina: coletado em 12/05/2024")
+
+    assert extraction.results == {}
+    assert extraction.unresolved_terms == ["Creatinina"]
+
+
+def test_value_after_another_analyte_belongs_to_it(extractor):
+    extraction = extractor.extract("Insulina\nTSH: 2,10 µUI/mL")
+
+    assert extraction.results == {"TSH": "2,10 µUI/mL"}
+    assert extraction.unresolved_terms == ["Insulina"]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [("5,4", 5.4), ("1.234,5", 1234.5), ("150.000", 150000.0), ("5.4", 5.4), ("92", 92.0)],
+)
+def test_parse_brazilian_number(text, expected):
+    assert parse_brazilian_number(text) == pytest.approx(expected)
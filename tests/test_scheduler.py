@@ -0,0 +1,90 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.extraction.scheduler import LlmScheduler, TokenBucket, retry_after_seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str | None = None):
+        super().__init__("429 Too Many Requests")
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def test_retry_after_in_seconds():
+    assert retry_after_seconds(RateLimitError("2.5")) == 2.5
+    assert retry_after_seconds(RateLimitError()) is None
+    assert retry_after_seconds(RateLimitError("soon")) is None
+
+
+def test_retry_after_as_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    delay = retry_after_seconds(RateLimitError(format_datetime(retry_at, usegmt=True)))
+
+    assert 28 <= delay <= 30
+    # A date already past means retrying right away
+    assert retry_after_seconds(RateLimitError("Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0
+
+
+def test_token_bucket_resumes_at_the_steady_rate_after_a_pause():
+    async def acquire_times():
+        bucket = TokenBucket(rate=20, capacity=5)
+        start = time.monotonic()
+        bucket.pause(0.1)
+        times = []
+        for _ in range(3):
+            await bucket.acquire()
+            times.append(time.monotonic() - start)
+        return times
+
+    times = asyncio.run(acquire_times())
+
+    assert times[0] >= 0.1
+    # No burst after the pause: one token every 1/20s
+    assert times[1] - times[0] >= 0.04
+    assert times[2] - times[1] >= 0.04
+
+
+def test_rate_limit_pauses_the_queue_and_retries():
+    scheduler = LlmScheduler(requests_per_minute=6000, max_concurrency=2, max_retries=2)
+    attempts = []
+
+    async def limited_once():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RateLimitError("0.2")
+        return "ok"
+
+    try:
+        assert scheduler.run(limited_once) == "ok"
+        stats = scheduler.stats()
+    finally:
+        scheduler.shutdown()
+    assert attempts[1] - attempts[0] >= 0.2
+    assert (stats["rate_limited"], stats["completed"], stats["failed"]) == (1, 1, 0)
+
+
+def test_rate_limit_is_raised_after_max_retries():
+    scheduler = LlmScheduler(requests_per_minute=6000, max_concurrency=1, max_retries=1)
+    attempts = []
+
+    async def always_limited():
+        attempts.append(1)
+        raise RateLimitError("0")
+
+    try:
+        with pytest.raises(RateLimitError):
+            scheduler.run(always_limited)
+        stats = scheduler.stats()
+    finally:
+        scheduler.shutdown()
+    assert len(attempts) == 2
+    assert (stats["rate_limited"], stats["failed"]) == (1, 1)
@@ -0,0 +1,67 @@
+from src.utils.file_utils import find_medical_terms
+from src.utils.term_matcher import TermMatcher, fold_text
+
+TERMS = {
+    "Glicemia": ["Glicose em jejum", "Glicemia de jejum"],
+    "Hemoglobina": ["HbA1c", "Hemoglobina glicada"],
+    "HDL": ["HDL", "Colesterol HDL"],
+    "Colesterol total": ["Colesterol total"],
+    "Sódio": ["Sódio", "Na+"],
+    "LH": ["LH", "Hormônio luteinizante"],
+}
+
+
+def matcher() -> TermMatcher:
+    return TermMatcher(TERMS)
+
+
+def test_fold_text_maps_folded_offsets_back():
+    folded, offsets = fold_text("Sódio  \n sérico")
+
+    assert folded == "sodio serico"
+    assert offsets[folded.index("serico")] == 9
+    assert offsets[-1] == len("Sódio  \n sérico")
+
+
+def test_matching_ignores_case_accents_and_whitespace_runs():
+    text = "SODIO: 140 mEq/L\nglicose   em\njejum: 92 mg/dL"
+
+    matches = matcher().find_all(text)
+
+    assert [(m.canonical, text[m.start:m.end]) for m in matches] == [
+        ("Sódio", "SODIO"),
+        ("Glicemia", "glicose   em\njejum"),
+    ]
+
+
+def test_canonical_name_alone_is_not_a_match():
+    assert matcher().find_terms("Hemoglobina: 14,2 g/dL\nGlicemia pós-prandial: 140 mg/dL") == []
+
+
+def test_synonyms_only_match_at_word_boundaries():
+    assert matcher().find_terms("Sódiox HDLs") == []
+    assert matcher().find_terms("(HDL)") == ["HDL"]
+
+
+def test_symbol_edges_need_no_boundary():
+    assert matcher().find_terms("Na+: 140 mEq/L") == ["Sódio"]
+
+
+def test_short_acronyms_are_case_sensitive():
+    assert matcher().find_terms("lh: 3,1 mUI/mL") == []
+    assert matcher().find_terms("LH: 3,1 mUI/mL") == ["LH"]
+
+
+def test_overlaps_resolve_leftmost_longest():
+    matches = matcher().find_all("Colesterol HDL: 55 mg/dL; Colesterol total: 180 mg/dL")
+
+    assert [(m.canonical, m.synonym) for m in matches] == [
+        ("HDL", "Colesterol HDL"),
+        ("Colesterol total", "Colesterol total"),
+    ]
+
+
+def test_find_medical_terms_uses_the_shared_dictionary():
+    text = "HEMOGLOBINA GLICADA (HbA1c): 5,4 %\nTSH: 2,10 µUI/mL"
+
+    assert find_medical_terms(text) == ["Hemoglobina", "TSH"]